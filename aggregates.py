@@ -0,0 +1,178 @@
+# aggregates.py
+#
+# Running per-category aggregates kept in data["aggregates"]:
+#   {category: {"total": ..., "count": ..., "min": ..., "max": ...}}
+# They are updated on every add_expense and persisted with the data, so the
+# summary screens read O(categories) numbers instead of re-summing every list.
+# When data["expenses"] is a ledger.Ledger (as storage keeps it), totals
+# come straight from its exact paise sums.
+
+from calendar import monthrange
+from datetime import date
+
+
+def _empty():
+    return {"total": 0, "count": 0, "min": None, "max": None}
+
+
+def update_aggregates(aggregates, category, amount):
+    agg = aggregates.setdefault(category, _empty())
+    agg["total"] += amount
+    agg["count"] += 1
+    agg["min"] = amount if agg["min"] is None else min(agg["min"], amount)
+    agg["max"] = amount if agg["max"] is None else max(agg["max"], amount)
+    return agg
+
+
+def build_aggregates(expenses):
+    if hasattr(expenses, "category_totals"):
+        aggregates = {cat: _empty() for cat in expenses.categories}
+        for expense in expenses:
+            update_aggregates(aggregates, expense.category, expense.amount)
+        return aggregates
+    aggregates = {}
+    for cat, values in expenses.items():
+        aggregates[cat] = _empty()
+        for amount in values:
+            update_aggregates(aggregates, cat, amount)
+    return aggregates
+
+
+def _counts(expenses):
+    if hasattr(expenses, "category_counts"):
+        return expenses.category_counts()
+    return {cat: len(values) for cat, values in expenses.items()}
+
+
+def ensure_aggregates(data):
+    """Return data["aggregates"], rebuilding it if missing or out of step with the lists."""
+    expenses = data.setdefault("expenses", {})
+    aggregates = data.get("aggregates")
+    counts = _counts(expenses)
+    stale = (
+        aggregates is None
+        or aggregates.keys() != counts.keys()
+        or any(aggregates[cat]["count"] != count for cat, count in counts.items())
+    )
+    if stale:
+        aggregates = data["aggregates"] = build_aggregates(expenses)
+    return aggregates
+
+
+def category_totals(data):
+    expenses = data.get("expenses")
+    if hasattr(expenses, "category_totals"):
+        return expenses.category_totals()
+    return {cat: agg["total"] for cat, agg in ensure_aggregates(data).items()}
+
+
+def total_expense(data):
+    expenses = data.get("expenses")
+    if hasattr(expenses, "total"):
+        return expenses.total()
+    return sum(agg["total"] for agg in ensure_aggregates(data).values())
+
+
+# -------------------- Time rollups --------------------
+# Per-category totals at day, ISO-week and month granularity, extended as
+# logs are appended:
+#   {"rows": <logs covered>, "max_date": "YYYY-MM-DD",
+#    "day": {cat: {"2024-04-01": total}}, "week": {cat: {"2024-W14": total}},
+#    "month": {cat: {"2024-04": total}}}
+# Monthly summaries then cost O(months), not O(transactions). For a store's
+# data (logs held as a ledger.Ledger) the rollups live in memory next to the
+# ledger and are rebuilt from the logs after a fresh load; they never enter
+# finance_data.json. A plain dict of logs gets them in data["rollups"].
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def period_keys(iso_date):
+    d = date.fromisoformat(str(iso_date)[:10])
+    year, week, _ = d.isocalendar()
+    return {"day": d.isoformat(), "week": f"{year}-W{week:02d}", "month": d.isoformat()[:7]}
+
+
+def _empty_rollups():
+    return {"rows": 0, "max_date": None, **{g: {} for g in GRANULARITIES}}
+
+
+def update_rollups(rollups, category, amount, iso_date):
+    keys = period_keys(iso_date)
+    for granularity in GRANULARITIES:
+        buckets = rollups[granularity].setdefault(category, {})
+        buckets[keys[granularity]] = buckets.get(keys[granularity], 0) + amount
+    if rollups["max_date"] is None or keys["day"] > rollups["max_date"]:
+        rollups["max_date"] = keys["day"]
+    rollups["rows"] += 1
+
+
+def extend_rollups(previous, rows):
+    """New rollups: `previous` (None for empty; left unmodified) plus log `rows`."""
+    if previous is None:
+        rollups = _empty_rollups()
+    else:
+        rollups = {"rows": previous["rows"], "max_date": previous["max_date"]}
+        rollups.update({g: dict(previous[g]) for g in GRANULARITIES})
+    copied = set()
+    for log in rows:
+        category = log["category"]
+        if category not in copied:
+            # Copy a category's buckets before its first update
+            for granularity in GRANULARITIES:
+                rollups[granularity][category] = dict(rollups[granularity].get(category, {}))
+            copied.add(category)
+        update_rollups(rollups, category, float(log["amount"]), log["date"])
+    return rollups
+
+
+def ensure_rollups(data):
+    """Return the rollups for data["logs"], extended with any log rows they haven't seen."""
+    logs = data.setdefault("logs", [])
+    if hasattr(logs, "derived"):
+        return logs.derived("rollups", extend_rollups)
+    rollups = data.get("rollups")
+    if rollups is None or rollups["rows"] > len(logs):
+        rollups = data["rollups"] = _empty_rollups()
+    for log in logs[rollups["rows"]:]:
+        update_rollups(rollups, log["category"], float(log["amount"]), log["date"])
+    return rollups
+
+
+def monthly_totals(data, category=None):
+    """{month: total} across all categories (or one), in month order."""
+    months = {}
+    per_category = ensure_rollups(data)["month"]
+    for cat, buckets in per_category.items():
+        if category is not None and cat != category:
+            continue
+        for month, total in buckets.items():
+            months[month] = months.get(month, 0) + total
+    return dict(sorted(months.items()))
+
+
+def average_monthly_from_rollups(data, from_date=None):
+    """Mean monthly total per category over months with entries, from `from_date` on."""
+    rollups = ensure_rollups(data)
+    start_month = from_date[:7] if from_date else None
+    averages = {}
+    for cat, buckets in rollups["month"].items():
+        totals = {month: total for month, total in buckets.items() if start_month is None or month >= start_month}
+        if start_month in totals:
+            # Window starts mid-month: only count that month's days from from_date on
+            day_totals = rollups["day"].get(cat, {})
+            first = date.fromisoformat(from_date)
+            days = [
+                day_totals[key] for key in (
+                    date(first.year, first.month, d).isoformat()
+                    for d in range(first.day, monthrange(first.year, first.month)[1] + 1)
+                )
+                if key in day_totals
+            ]
+            if days:
+                totals[start_month] = sum(days)
+            else:
+                del totals[start_month]
+        if totals:
+            averages[cat] = sum(totals.values()) / len(totals)
+    return averages
@@ -0,0 +1,453 @@
+# benchmark.py
+#
+# Benchmark harness for the data and analysis hot paths, run against
+# synthetic data (synth_data.py) at sizes from 10^3 up to 10^7 rows:
+#
+#   python benchmark.py --sizes 1e3,1e4,1e5 --output bench.json
+#   python benchmark.py --sizes 1e3,1e4,1e5 --compare bench.json
+#   python benchmark.py --imports --output startup.json
+#
+# Each result records the best and median wall time over a few runs, and
+# results are written as JSON tagged with the git commit, so two runs can
+# be diffed with --compare. Cases whose dependencies are missing (pandas
+# for the DataFrame paths) are recorded as skipped rather than failing the
+# run. 10^7 rows needs several GB of RAM for the in-memory dict schema.
+# --imports times a cold import of each app module in a fresh interpreter
+# and lists which heavy packages (pandas, matplotlib, ...) it drags in.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+
+from synth_data import CATEGORIES, generate_finance_data, iter_chat_lines
+
+BENCHMARKS = []
+
+
+def benchmark(name, ops=1):
+    """Register `setup(fixture) -> callable`; `ops` is how many operations one call performs."""
+    def register(setup):
+        BENCHMARKS.append((name, setup, ops))
+        return setup
+    return register
+
+
+class Fixture:
+    """Synthetic dataset of one size, plus lazily built derived forms."""
+
+    def __init__(self, rows, seed, workdir):
+        self.rows = rows
+        self.seed = seed
+        self.workdir = workdir
+        self.data = generate_finance_data(rows, seed)
+        self.logs = self.data["logs"]
+
+    @cached_property
+    def df(self):
+        from time_analyzer import build_category_prefix_logs
+        return build_category_prefix_logs(self.logs)
+
+    @cached_property
+    def range_index(self):
+        from time_analyzer import build_range_index
+        return build_range_index(self.logs)
+
+    @cached_property
+    def chat_lines(self):
+        return list(iter_chat_lines(self.rows, self.seed))
+
+    @cached_property
+    def store(self):
+        from storage import JournalStore
+        store = JournalStore(
+            os.path.join(self.workdir, "finance_data.json"), compact_every=sys.maxsize, fsync=False
+        )
+        store.save(self.data)
+        return store
+
+
+# -------------------- Storage --------------------
+
+@benchmark("storage.save_data")
+def _save(fx):
+    return lambda: fx.store.save(fx.data)
+
+
+@benchmark("storage.load_data")
+def _load(fx):
+    store = fx.store
+    return lambda: store.load(use_cache=False)
+
+
+@benchmark("storage.record_expense", ops=100)
+def _record(fx):
+    # A store of its own, loaded from a copy of the snapshot file, so the
+    # appends reach neither fx.data nor the journal the other cases read
+    from storage import DATA_FILE, JournalStore
+    path = os.path.join(fx.workdir, "record", DATA_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    shutil.copyfile(fx.store.path, path)
+    store = JournalStore(path, compact_every=sys.maxsize, fsync=False)
+    store.load()
+    def run():
+        for _ in range(100):
+            store.append("add_expense", category="benchmark", amount=1, date="2024-04-01")
+    return run
+
+
+# -------------------- dsa_algos --------------------
+
+@benchmark("dsa_algos.add_expense", ops=1000)
+def _add_expense(fx):
+    from dsa_algos import add_expense
+    # Fresh lists so the shared fixture isn't mutated
+    data = {"expenses": {cat: list(values) for cat, values in fx.data["expenses"].items()}}
+    def run():
+        for _ in range(1000):
+            add_expense(data, "benchmark", 1)
+    return run
+
+
+@benchmark("dsa_algos.build_prefix_sum")
+def _prefix_sum(fx):
+    from dsa_algos import build_prefix_sum
+    return lambda: build_prefix_sum(fx.logs)
+
+
+@benchmark("dsa_algos.monthly_expense_summary[df]")
+def _monthly_df(fx):
+    from dsa_algos import monthly_expense_summary
+    df = fx.df
+    return lambda: monthly_expense_summary(df)
+
+
+@benchmark("dsa_algos.monthly_expense_summary[rollups]")
+def _monthly_rollups(fx):
+    from dsa_algos import monthly_expense_summary
+    return lambda: monthly_expense_summary(fx.data)
+
+
+# -------------------- time_analyzer --------------------
+
+@benchmark("time_analyzer.build_category_prefix_logs")
+def _prefix_logs(fx):
+    from time_analyzer import build_category_prefix_logs
+    return lambda: build_category_prefix_logs(fx.logs)
+
+
+@benchmark("time_analyzer.build_range_index")
+def _range_index(fx):
+    from time_analyzer import build_range_index
+    return lambda: build_range_index(fx.logs)
+
+
+def _time_analyzer_case(function, source, *args):
+    # Same query over a pandas DataFrame, the Fenwick range index, or the
+    # finance dict's rollups
+    @benchmark(f"time_analyzer.{function}[{source}]")
+    def setup(fx):
+        import time_analyzer
+        query = getattr(time_analyzer, function)
+        target = {"df": lambda: fx.df, "index": lambda: fx.range_index, "rollups": lambda: fx.data}[source]()
+        return lambda: query(target, *args)
+
+
+for _source in ("df", "index", "rollups"):
+    if _source != "rollups":
+        _time_analyzer_case("expense_last_n_days", _source, CATEGORIES[0], 30)
+    _time_analyzer_case("average_monthly_expense", _source)
+    _time_analyzer_case("highest_avg_spending_category", _source, 3)
+
+
+# -------------------- NLP and advice --------------------
+
+@benchmark("nlp_helper.extract_intent_entities")
+def _intents(fx):
+    from nlp_helper import extract_intent_entities
+    lines = fx.chat_lines
+    def run():
+        for line in lines:
+            extract_intent_entities(line)
+    return run
+
+
+@benchmark("family_advisor.generate_family_advice_summary")
+def _advice(fx):
+    from family_advisor import generate_family_advice_summary
+    return lambda: generate_family_advice_summary(fx.data)
+
+
+@benchmark("online_stats.update_stats", ops=1000)
+def _update_stats(fx):
+    from online_stats import ensure_stats, update_stats
+    stats = ensure_stats({"logs": list(fx.logs)})
+    def run():
+        for _ in range(1000):
+            update_stats(stats, "benchmark", 1, "2024-04-01")
+    return run
+
+
+@benchmark("ledger.from_logs")
+def _ledger_build(fx):
+    from ledger import Ledger
+    return lambda: Ledger.from_logs(fx.logs)
+
+
+@benchmark("ledger.to_logs")
+def _ledger_to_logs(fx):
+    from ledger import Ledger
+    ledger = Ledger.from_logs(fx.logs)
+    return ledger.to_logs
+
+
+@benchmark("sketches.top_expenses[quarter]")
+def _top_expenses(fx):
+    from sketches import ensure_sketches, quarter_range, top_expenses
+    ensure_sketches(fx.data)
+    start, end = quarter_range(fx.logs[-1]["date"])
+    return lambda: top_expenses(fx.data, 10, start=start, end=end)
+
+
+@benchmark("sketches.category_quantiles")
+def _quantiles(fx):
+    from sketches import category_quantiles, ensure_sketches
+    ensure_sketches(fx.data)
+    return lambda: category_quantiles(fx.data)
+
+
+def verify_online_stats(rows, seed=0, tolerance=1e-6):
+    """Compare the streaming per-category stats with a pandas batch recomputation."""
+    import pandas as pd
+    from online_stats import EWMA_ALPHA, WINDOW_DAYS, ensure_stats, recent_count
+
+    data = generate_finance_data(rows, seed)
+    stats = ensure_stats(data)["categories"]
+    df = pd.DataFrame(data["logs"])
+    df["date"] = pd.to_datetime(df["date"])
+    last = df["date"].max()
+    mismatches = []
+    for category, group in df.groupby("category", sort=False):
+        expected = {
+            "n": len(group),
+            "mean": group["amount"].mean(),
+            "variance": group["amount"].var(ddof=0),
+            "ewma": group["amount"].ewm(alpha=EWMA_ALPHA, adjust=False).mean().iloc[-1],
+            "recent_30d": int((group["date"] > last - pd.Timedelta(days=WINDOW_DAYS)).sum()),
+        }
+        cat = stats[category]
+        actual = {
+            "n": cat["n"],
+            "mean": cat["mean"],
+            "variance": cat["m2"] / cat["n"],
+            "ewma": cat["ewma"],
+            "recent_30d": recent_count(cat, last.date().isoformat()),
+        }
+        for key, value in expected.items():
+            if abs(actual[key] - value) > tolerance * max(1.0, abs(value)):
+                mismatches.append((category, key, actual[key], value))
+    return mismatches
+
+
+# -------------------- Runner --------------------
+
+def time_case(run, repeat, budget):
+    """Run at least once and up to `repeat` times or until `budget` seconds pass."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        t0 = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > budget:
+            break
+    return timings
+
+
+def run_benchmarks(sizes, repeat=5, budget=10.0, seed=0, only=None, progress=None):
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            fixture = Fixture(rows, seed, workdir)
+            for name, setup, ops in BENCHMARKS:
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                result = {"benchmark": name, "rows": rows}
+                try:
+                    run = setup(fixture)
+                    timings = time_case(run, repeat, budget)
+                except ImportError as e:
+                    result.update(status="skipped", reason=f"{type(e).__name__}: {e}")
+                else:
+                    best = min(timings)
+                    result.update(
+                        status="ok",
+                        runs=len(timings),
+                        best_s=best,
+                        median_s=statistics.median(timings),
+                        ops=ops,
+                        per_op_s=best / ops,
+                        rows_per_s=rows / best if best else None,
+                    )
+                results.append(result)
+                if progress:
+                    progress(result)
+    return results
+
+
+# -------------------- Import / cold-start times --------------------
+
+IMPORT_MODULES = (
+    "storage", "aggregates", "dsa_algos", "time_analyzer", "visualizer", "llm_groq",
+    "plan_pipeline", "intent_router", "huggingface_nlp", "emi_calculator",
+    "savings_simulation", "metrics", "chatbot",
+)
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "requests", "dotenv", "transformers", "torch")
+
+_IMPORT_PROBE = (
+    "import sys, time; t = time.perf_counter(); import {module}; t = time.perf_counter() - t; "
+    "print('@@', t, ','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def time_import(module, repeat=5):
+    """Fresh-interpreter import time of `module`, plus which heavy packages it pulled in."""
+    result = {"benchmark": f"import:{module}", "rows": 0}
+    timings, heavy = [], ""
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+            # Background prewarming would load the deferred packages mid-probe
+            env={**os.environ, "FINANCE_PREWARM": "0"},
+        )
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ["failed"])[-1]
+            result.update(status="skipped", reason=error)
+            return result
+        # The module may print too; the probe's line is the last one tagged @@
+        probe = [line for line in proc.stdout.splitlines() if line.startswith("@@")][-1].split(" ")
+        timings.append(float(probe[1]))
+        heavy = probe[2] if len(probe) > 2 else ""
+    best = min(timings)
+    result.update(
+        status="ok",
+        runs=len(timings),
+        best_s=best,
+        median_s=statistics.median(timings),
+        ops=1,
+        per_op_s=best,
+        heavy_imports=[m for m in heavy.split(",") if m],
+    )
+    return result
+
+
+def import_benchmarks(modules=IMPORT_MODULES, repeat=5, only=None, progress=None):
+    results = []
+    for module in modules:
+        if only and not any(pattern in module for pattern in only):
+            continue
+        result = time_import(module, repeat)
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results):
+    return {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline, results, threshold):
+    """Print per-case time ratios against a baseline report; return the regressions."""
+    old = {(r["benchmark"], r["rows"]): r for r in baseline["results"] if r["status"] == "ok"}
+    regressions = []
+    for result in results:
+        before = old.get((result["benchmark"], result["rows"]))
+        if before is None or result["status"] != "ok":
+            continue
+        ratio = result["per_op_s"] / before["per_op_s"] if before["per_op_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{result['benchmark']:<55} {result['rows']:>9}  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def _format(result):
+    if result["status"] != "ok":
+        return f"{result['benchmark']:<55} {result['rows']:>9}  skipped ({result['reason']})"
+    line = (
+        f"{result['benchmark']:<55} {result['rows']:>9}  "
+        f"{result['best_s'] * 1000:10.3f} ms  ({result['runs']} runs)"
+    )
+    if result.get("heavy_imports"):
+        line += f"  pulls in {', '.join(result['heavy_imports'])}"
+    return line
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the finance assistant hot paths.")
+    parser.add_argument("--sizes", default="1e3,1e4,1e5", help="comma-separated row counts, e.g. 1e3,1e6")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=10.0, help="max seconds of repeats per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", action="append", help="run only cases whose name contains this")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--verify-stats", action="store_true", help="check online_stats against pandas and exit")
+    parser.add_argument("--imports", action="store_true", help="time cold imports of the app modules instead")
+    args = parser.parse_args()
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    if args.verify_stats:
+        failed = False
+        for rows in sizes:
+            mismatches = verify_online_stats(rows, args.seed)
+            print(f"online_stats {rows:>9} rows: {len(mismatches)} mismatches")
+            for mismatch in mismatches:
+                print("   ", *mismatch)
+            failed = failed or bool(mismatches)
+        raise SystemExit(1 if failed else 0)
+
+    if args.imports:
+        results = import_benchmarks(repeat=args.repeat, only=args.only, progress=lambda r: print(_format(r)))
+    else:
+        results = run_benchmarks(
+            sizes, args.repeat, args.budget, args.seed, args.only, progress=lambda r: print(_format(r))
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report(results), f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print()
+        if compare(baseline, results, args.threshold):
+            raise SystemExit(1)
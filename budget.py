@@ -1,13 +1,135 @@
+from bisect import bisect_left, insort
+
 def check_budget_status(income, expenses, budget):
     total_expense = sum(expenses)
     return "Under Budget" if total_expense <= budget else "Over Budget"
 
 def optimize_budget_allocation(income, expenses):
-    # DAA: Greedy method to keep highest remaining
-    sorted_exp = sorted(expenses)
-    allocated = 0
-    for e in sorted_exp:
-        if allocated + e > income:
-            break
-        allocated += e
-    return allocated, income - allocated
+    # Cover as much of the expenses as possible within income
+    plan = allocate_budget(income, [("", e) for e in expenses])
+    return plan["allocated"], income - plan["allocated"]
+
+# -------------------- Priority-aware allocator --------------------
+# Chooses which expenses to fund so that the priority-weighted amount covered
+# is as large as possible without exceeding income (a 0/1 knapsack where an
+# item's value is priority * amount).
+#
+# - Up to EXACT_LIMIT items: exact dynamic programming over the Pareto
+#   frontier of (cost, value) states. The frontier can hold every subset
+#   (e.g. float amounts that share one weight), so this is O(2^n): about
+#   6 ms at 12 items but 2 s at 20.
+# - Beyond that: greedy by priority (value per rupee), then the better of
+#   that plan and the single most valuable affordable item. This is the
+#   classic knapsack 1/2-approximation: value >= OPT / 2.
+
+EXACT_LIMIT = 12
+
+# Weight per rupee; needs outrank wants
+PRIORITY_WEIGHTS = {"need": 2.0, "want": 1.0}
+NEEDS = {"rent", "food", "groceries", "loan", "emi", "utilities", "bills", "medicine", "transport", "education", "insurance"}
+
+def category_priority(category, priorities=None):
+    if priorities and category in priorities:
+        return priorities[category]
+    kind = "need" if str(category).lower() in NEEDS else "want"
+    return PRIORITY_WEIGHTS[kind]
+
+def _exact(income, items):
+    # items: [(id, amount, weight)]; states are (cost, value, chosen ids)
+    frontier = [(0, 0, ())]
+    for item_id, amount, weight in items:
+        grown = frontier + [
+            (cost + amount, value + weight * amount, chosen + (item_id,))
+            for cost, value, chosen in frontier
+            if cost + amount <= income
+        ]
+        # Keep only states not dominated by a cheaper one with at least as much value
+        grown.sort(key=lambda state: (state[0], -state[1]))
+        frontier = []
+        for state in grown:
+            if not frontier or state[1] > frontier[-1][1]:
+                frontier.append(state)
+    cost, value, chosen = frontier[-1]
+    return set(chosen), value
+
+def _greedy(income, ordered):
+    # ordered: [(id, amount, weight)] by weight desc, amount desc
+    chosen, allocated, value = set(), 0, 0
+    for item_id, amount, weight in ordered:
+        if allocated + amount <= income:
+            chosen.add(item_id)
+            allocated += amount
+            value += weight * amount
+    best_single = max(
+        ((item_id, weight * amount) for item_id, amount, weight in ordered if amount <= income),
+        key=lambda pair: pair[1],
+        default=None,
+    )
+    if best_single is not None and best_single[1] > value:
+        return {best_single[0]}, best_single[1]
+    return chosen, value
+
+def _plan(income, ordered, exact_limit):
+    if len(ordered) <= exact_limit:
+        chosen, value = _exact(income, ordered)
+        method = "exact"
+    else:
+        chosen, value = _greedy(income, ordered)
+        method = "greedy"
+    funded = [(item_id, amount) for item_id, amount, _ in ordered if item_id in chosen]
+    unfunded = [(item_id, amount) for item_id, amount, _ in ordered if item_id not in chosen]
+    allocated = sum(amount for _, amount in funded)
+    return {
+        "funded": funded,
+        "unfunded": unfunded,
+        "allocated": allocated,
+        "remaining": income - allocated,
+        "value": value,
+        "method": method,
+    }
+
+def allocate_budget(income, items, priorities=None, exact_limit=EXACT_LIMIT):
+    """
+    One-off plan for `items`, a list of (category, amount).
+
+    Returns funded/unfunded lists of (index, amount), the amount allocated and
+    remaining, the priority-weighted value covered and which method was used.
+    """
+    allocator = BudgetAllocator(income, priorities, exact_limit)
+    for category, amount in items:
+        allocator.add(category, amount)
+    return allocator.plan()
+
+class BudgetAllocator:
+    """
+    Keeps expense items in priority order as they are added or removed, so
+    re-planning after one change is a single pass instead of a full re-sort.
+    """
+
+    def __init__(self, income, priorities=None, exact_limit=EXACT_LIMIT):
+        self.income = income
+        self.priorities = priorities
+        self.exact_limit = exact_limit
+        self._order = []    # sorted keys (-weight, -amount, id)
+        self._items = {}    # id -> (category, amount, key)
+        self._next_id = 0
+
+    def add(self, category, amount):
+        item_id = self._next_id
+        self._next_id += 1
+        weight = category_priority(category, self.priorities)
+        key = (-weight, -amount, item_id)
+        insort(self._order, key)
+        self._items[item_id] = (category, amount, key)
+        return item_id
+
+    def remove(self, item_id):
+        _, _, key = self._items.pop(item_id)
+        del self._order[bisect_left(self._order, key)]
+
+    def __len__(self):
+        return len(self._items)
+
+    def plan(self):
+        ordered = [(item_id, -neg_amount, -neg_weight) for neg_weight, neg_amount, item_id in self._order]
+        return _plan(self.income, ordered, self.exact_limit)
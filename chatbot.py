@@ -1,64 +1,34 @@
 import streamlit as st
 import json
-import os
+import time
 from datetime import datetime
-import pandas as pd
-from family_advisor import generate_family_advice_summary, build_llm_prompt
-from llm_groq import call_groq_llm
-import json
+import metrics
+import prewarm
+from plan_pipeline import run_plan, RULE_SECTIONS, AI_SECTIONS, FULL_PLAN
+from llm_groq import stream_groq_llm
 
-from nlp_helper import extract_intent_entities
+from intent_router import get_router, route_intent
 from dsa_algos import (
-    add_expense,
     total_expenses_by_category,
     highest_expense_category,
     lowest_expense_category,
     suggest_savings_plan,
-    build_prefix_sum,
     monthly_expense_summary,
+    top_k_expenses,
+)
+from time_analyzer import highest_avg_spending_category
+from visualizer import show_pie_chart, show_bar_chart, show_expense_series
+from emi_calculator import calculate_emi, emi_grid, savings_goal_plan
+from aggregates import total_expense
+from online_stats import assess_expense
+from sketches import category_quantiles, daily_spend_quantile, quarter_range
+from storage import (
+    get_store,
+    load_data,
+    record_expense,
+    record_income_savings,
+    record_family_profile,
 )
-from visualizer import show_pie_chart, show_bar_chart
-from emi_calculator import calculate_emi, savings_goal_plan
-
-# -------------------- Data Utilities --------------------
-
-def load_data():
-    default_data = {
-        "expenses": {
-            "food": [],
-            "transport": [],
-            "entertainment": [],
-            "utilities": [],
-            "shopping": [],
-        },
-        "income": 0,
-        "savings": 0,
-        "logs": [],
-        "family_profile": {
-            "married": False,
-            "spouse_income": 0,
-            "children": [],
-            "dependents": [],
-        },
-    }
-
-    if not os.path.exists("finance_data.json"):
-        with open("finance_data.json", "w") as f:
-            json.dump(default_data, f)
-
-    with open("finance_data.json", "r") as f:
-        data = json.load(f)
-
-    # Ensure all keys exist
-    for key in default_data:
-        if key not in data:
-            data[key] = default_data[key]
-
-    return data
-
-def save_data(data):
-    with open("finance_data.json", "w") as f:
-        json.dump(data, f, indent=4)
 
 # -------------------- App UI --------------------
 
@@ -66,11 +36,17 @@ st.set_page_config(page_title="💬 Financial Chatbot", layout="centered")
 st.title("💬 Smart Financial Chatbot")
 st.caption("Your personal finance assistant")
 
-data = load_data()
+# Each user ID gets its own data shard; "default" is finance_data.json
+user_id = st.sidebar.text_input("👤 User ID", value="default").strip() or "default"
+
+with metrics.span("finance_stage_seconds", stage="load_data"):
+    data = load_data(user_id)
 expenses = data["expenses"]
 income = data["income"]
 savings = data["savings"]
 logs = data.get("logs", [])
+# Exact per-category totals from the ledger's running paise sums
+totals = total_expenses_by_category(expenses)
 family = data.get("family_profile", {})
 
 # -------------------- Chat Input --------------------
@@ -78,48 +54,61 @@ family = data.get("family_profile", {})
 user_input = st.text_input("👤 You:", placeholder="e.g., Add expense of 300 for food")
 
 if user_input:
-    intent, entities = extract_intent_entities(user_input)
+    started = time.perf_counter()
+    # Regex first; the zero-shot model only sees what the regex misses
+    with metrics.span("finance_stage_seconds", stage="route_intent"):
+        intent, entities = route_intent(user_input)
+    metrics.inc("finance_intents_total", intent=intent)
 
     if intent == "add_expense":
         if "amount" in entities and "category" in entities:
-            data = add_expense(data, entities["category"], entities["amount"])
-            data["logs"].append({
-                "amount": entities["amount"], 
-                "category": entities["category"], 
-                "date": str(datetime.now().date())
-            })
-            save_data(data)
+            today = str(datetime.now().date())
+            # Checked against the category's running stats before it joins them
+            check = assess_expense(data, entities["category"], entities["amount"], today)
+            record_expense(entities["category"], entities["amount"], today, user_id=user_id)
+            # Snapshots don't change under us; take a fresh one so the rest
+            # of this run shows the new expense
+            data = load_data(user_id)
+            expenses, logs = data["expenses"], data.get("logs", [])
+            totals = total_expenses_by_category(expenses)
             st.success(f"✅ Added ₹{entities['amount']} to {entities['category']}")
+            if check["outlier"]:
+                st.warning(
+                    f"⚠️ That's unusual for {entities['category']}: you typically spend "
+                    f"₹{check['mean']:.0f} (± ₹{check['std']:.0f}) per entry."
+                )
+            if check["recurring"]:
+                st.info(f"🔁 Looks like a {check['recurring']} recurring charge of ₹{entities['amount']}.")
         else:
             st.warning("⚠️ Please say like: Add expense of 500 for food")
 
     elif intent == "category_query":
         cat = entities.get("category")
-        if cat and cat in expenses:
-            total = sum(expenses[cat])
-            st.info(f"💸 You've spent ₹{total} on {cat}")
+        if cat and cat in totals:
+            st.info(f"💸 You've spent ₹{totals[cat]} on {cat}")
         else:
             st.warning("⚠️ Couldn't find data for that category.")
 
     elif intent == "spending_analysis":
-        totals = total_expenses_by_category(expenses)
         st.subheader("📊 Category-wise Spending")
         st.json(totals)
         st.info(highest_expense_category(expenses))
         st.info(lowest_expense_category(expenses))
 
     elif intent == "savings_check":
-        total_expense = sum(sum(v) for v in expenses.values())
-        st.info(f"💰 Income: ₹{income} | Expenses: ₹{total_expense} | Savings: ₹{savings}")
-        st.success(suggest_savings_plan(income, total_expense))
+        spent = total_expense(data)
+        st.info(f"💰 Income: ₹{income} | Expenses: ₹{spent} | Savings: ₹{savings}")
+        st.success(suggest_savings_plan(income, spent))
 
     elif intent == "suggestion":
         st.info(highest_expense_category(expenses))
-        st.success(suggest_savings_plan(income, sum(sum(v) for v in expenses.values())))
+        st.success(suggest_savings_plan(income, total_expense(data)))
 
     else:
         st.warning("🤖 Sorry, I didn't understand that.")
 
+    metrics.observe("finance_interaction_seconds", time.perf_counter() - started, intent=intent)
+
 # -------------------- Extra Tools --------------------
 
 st.divider()
@@ -129,31 +118,71 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("📊 Show Pie Chart"):
-        show_pie_chart(expenses)
+        show_pie_chart(expenses, totals)
 
 with col2:
     if st.button("📊 Show Bar Chart"):
-        show_bar_chart(expenses)
+        show_bar_chart(expenses, totals)
 
+# Expander bodies run even when collapsed, so the views below load and
+# draw nothing (nor import pandas or matplotlib) until they are asked for
 with st.expander("📅 Monthly Expense Summary"):
-    if logs:
-        df = pd.DataFrame(logs)
-        df["amount"] = df["amount"].astype(float)
-        df["date"] = pd.to_datetime(df["date"])
-        prefix_df = build_prefix_sum(df)
-        monthly_summary = monthly_expense_summary(prefix_df)
-        st.bar_chart(monthly_summary)
-    else:
+    if not logs:
         st.info("ℹ️ No expense logs available.")
+    elif st.checkbox("Show monthly summary"):
+        # Served from the in-memory monthly rollups: O(months)
+        st.bar_chart(monthly_expense_summary(data))
+        st.caption(highest_avg_spending_category(data, 3))
+
+with st.expander("📈 Spending Trend"):
+    if not logs:
+        st.info("ℹ️ No expense logs available.")
+    elif st.checkbox("Show spending trend"):
+        # Memory-mapped columnar history plus the rows since the last
+        # compaction, downsampled to at most MAX_POINTS points
+        show_expense_series(get_store(user_id).log_columns(logs))
+
+with st.expander("🔝 Largest Expenses & Percentiles"):
+    if not logs:
+        st.info("ℹ️ No expense logs available.")
+    elif st.checkbox("Show largest expenses & percentiles"):
+        # Per-month heaps and quantile sketches: independent of history length
+        start, end = quarter_range()
+        top = top_k_expenses(data, 10, start, end)
+        st.markdown(f"**10 largest expenses this quarter** ({start} to {end})")
+        if top:
+            st.dataframe(top, hide_index=True)
+        else:
+            st.info("ℹ️ No expenses logged this quarter.")
+        st.markdown("**Per-expense percentiles by category** (approximate, ±1.3% in rank)")
+        st.dataframe(
+            [
+                {"Category": cat, "Median ₹": q[0.5], "p90 ₹": q[0.9], "p99 ₹": q[0.99],
+                 "Median per day ₹": daily_spend_quantile(data, cat, 0.5)}
+                for cat, q in category_quantiles(data).items()
+            ],
+            hide_index=True,
+        )
 
 with st.expander("💰 EMI Calculator"):
     p = st.number_input("Loan Amount (₹)", min_value=1000)
-    r = st.number_input("Interest Rate (%)", min_value=1.0)
+    r = st.number_input("Interest Rate (%)", min_value=0.0)
     t = st.number_input("Loan Duration (Months)", min_value=1)
     if st.button("Calculate EMI"):
         emi = calculate_emi(p, r, t)
         st.success(f"📈 Your EMI is ₹{emi}")
 
+    if st.checkbox("Show rate × tenure sensitivity table"):
+        # One vectorized call for the whole grid
+        import numpy as np
+        rates = np.arange(7.0, 12.5, 0.5)
+        tenures = np.array([12, 24, 36, 60, 120, 180, 240, 300, 360])
+        grid = emi_grid(p, rates[:, None], tenures[None, :])
+        table = {"Rate %": [f"{rate:.1f}" for rate in rates]}
+        for j, tenure in enumerate(tenures):
+            table[f"{tenure}m"] = np.round(grid[:, j], 2)
+        st.dataframe(table, hide_index=True)
+
 with st.expander("🎯 Goal Planner"):
     goal = st.number_input("Target Goal (₹)", min_value=1000)
     curr = st.number_input("Current Savings (₹)", min_value=0)
@@ -162,15 +191,29 @@ with st.expander("🎯 Goal Planner"):
         per_month = savings_goal_plan(goal, curr, months)
         st.success(f"🚀 You should save ₹{per_month} per month to reach your goal.")
 
+    st.markdown("🎲 Monte Carlo projection (returns, inflation and spending vary)")
+    paths = st.select_slider("Simulated paths", options=[1_000, 10_000, 100_000, 1_000_000], value=10_000)
+    if st.button("Run Simulation"):
+        # NumPy-heavy; imported only when a simulation is actually run
+        from savings_simulation import assumptions_from_data, simulate_savings
+        assumptions = assumptions_from_data(data)
+        assumptions["starting_savings"] = curr
+        with st.spinner("Simulating..."):
+            sim = simulate_savings(goal, months, paths=paths, seed=42, **assumptions)
+        st.success(f"🎯 Chance of reaching ₹{goal:,} in {months} months: {sim['probability']:.0%}")
+        st.line_chart({f"p{pct}": band for pct, band in sim["bands"].items()})
+        st.caption(
+            f"Median outcome ₹{sim['final'][50]:,.0f} "
+            f"(5th–95th percentile: ₹{sim['final'][5]:,.0f} – ₹{sim['final'][95]:,.0f}), in today's rupees"
+        )
+
 # -------------------- Manual Data Setup --------------------
 
 with st.expander("🛠️ Setup Income & Savings"):
     income = st.number_input("Monthly Income (₹)", value=income)
     savings = st.number_input("Current Savings (₹)", value=savings)
     if st.button("Save"):
-        data["income"] = income
-        data["savings"] = savings
-        save_data(data)
+        record_income_savings(income, savings, user_id=user_id)
         st.success("✅ Income & Savings updated!")
 
 # -------------------- Family Profile --------------------
@@ -198,51 +241,67 @@ with st.expander("👪 Family Profile"):
     dependents_list = [dep.strip() for dep in dependents.split(",") if dep.strip()]
 
     if st.button("💾 Save Family Profile"):
-        data["family_profile"] = {
+        record_family_profile({
             "married": married,
             "spouse_income": spouse_income,
             "children": children_ages,
             "dependents": dependents_list
-        }
-        save_data(data)
+        }, user_id=user_id)
         st.success("✅ Family profile updated!")
 
 # -------------------- Family Financial Advice --------------------
 
+refresh_plan = st.checkbox("🔄 Ignore cached AI answers", value=False)
+
 if st.button("📘 Generate Comprehensive Financial Plan"):
     # Create two columns for side-by-side display
     col1, col2 = st.columns(2)
     
+    # Reserve a slot per section so results land in a stable order
+    # whichever finishes first
     with col1:
         st.subheader("📊 Rule-Based Recommendations")
-        rule_based = generate_family_advice_summary(data)
-        
-        with st.expander("Budget Allocation"):
-            st.json(rule_based["📊 Budget Advice"])
-        
-        with st.expander("Education Planning"):
-            for tip in rule_based["🎓 Child Education"]:
-                st.info(tip)
-        
-        with st.expander("Emergency Fund"):
-            st.success(rule_based["💼 Emergency Fund"])
-            
-        if "👵 Spouse Retirement" in rule_based:
-            with st.expander("Retirement Planning"):
-                st.warning(rule_based["👵 Spouse Retirement"])
+        rule_slots = {name: st.empty() for name in RULE_SECTIONS}
     
     with col2:
         st.subheader("🤖 AI-Powered Insights")
-        with st.spinner("Generating personalized advice..."):
-            prompt = build_llm_prompt(data)
-            result = call_groq_llm(prompt)
-            st.markdown(result)
-        
+        ai_slots = {name: st.empty() for name in AI_SECTIONS}
+    
+    rule_based, ai_advice = {}, {}
+    with st.spinner("Generating personalized advice..."):
+        for name, result in run_plan(data, refresh=refresh_plan):
+            if name in ai_slots:
+                ai_advice[name] = result
+                with ai_slots[name].container():
+                    with st.expander(name, expanded=name == FULL_PLAN):
+                        st.markdown(result)
+                continue
+            
+            if result is None:
+                continue
+            rule_based[name] = result
+            with rule_slots[name].container():
+                if name == "📊 Budget Advice":
+                    with st.expander("Budget Allocation"):
+                        st.json(result)
+                elif name == "🎓 Child Education":
+                    with st.expander("Education Planning"):
+                        for tip in result:
+                            st.info(tip)
+                elif name == "💼 Emergency Fund":
+                    with st.expander("Emergency Fund"):
+                        st.success(result)
+                elif name == "👵 Spouse Retirement":
+                    with st.expander("Retirement Planning"):
+                        st.warning(result)
+    
+    rule_based["🕒 Last Updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with col2:
         st.download_button(
             label="📥 Download Full Plan",
             data=json.dumps({
                 "rule_based": rule_based,
-                "ai_advice": result
+                "ai_advice": ai_advice
             }, indent=4),
             file_name="family_financial_plan.json"
         )
@@ -251,19 +310,35 @@ if st.button("📘 Generate Comprehensive Financial Plan"):
 
 with st.expander("🧠 Ask AI Suggestion"):
     if st.button("Get Groq LLM Suggestion"):
-        from llm_groq import call_groq_llm
         prompt = f"""
         I'm a financial advisor. Here's my profile:
         - Monthly Income: ₹{income}
         - Spouse Income: ₹{family.get('spouse_income', 0)}
         - Savings: ₹{savings}
         - Number of Children: {len(family.get('children', []) )}
-        - Expenses: {json.dumps(expenses)}
+        - Expenses: {json.dumps(totals)}
 
         Give personalized financial tips.
         """
 
-        result = call_groq_llm(prompt)
-        st.markdown(result)
+        st.write_stream(stream_groq_llm(prompt, refresh=refresh_plan))
+
+# -------------------- Debug Metrics --------------------
+# Only when started with FINANCE_METRICS=1
+
+if metrics.ENABLED:
+    metrics.start_exporters()
+    with st.sidebar.expander("🐞 Debug metrics"):
+        rows = metrics.summary()
+        for row in rows:
+            row["labels"] = ", ".join(f"{k}={v}" for k, v in row["labels"].items())
+        st.dataframe(rows, hide_index=True)
+        if st.button("Reset metrics"):
+            metrics.reset()
+
+# Warm the deferred imports now that the page is on screen, and load the
+# zero-shot model (once per process) so the first regex miss doesn't wait
+if prewarm.prewarm():
+    get_router().prewarm()
 
 # -------------------- End --------------------
\ No newline at end of file
@@ -0,0 +1,200 @@
+# columnar_logs.py
+#
+# Binary columnar on-disk format for expense logs.
+#
+# A log set named `base` is stored as one flat file per column plus a small
+# category dictionary:
+#   <base>.dates    int32   days since 1970-01-01
+#   <base>.codes    uint16  index into <base>.categories.json
+#   <base>.amounts  int64   amount in minor units (paise)
+# Appending a row writes a few bytes to each column file, and readers map the
+# files with numpy.memmap so analytics get NumPy arrays without parsing or
+# copying anything.
+#
+# storage keeps one of these next to each finance_data.json as a mirror of
+# its logs (<path>.logs.*), extended with the new rows at every compaction.
+
+import json
+import os
+from datetime import date
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+MINOR_UNITS = 100
+
+COLUMNS = {
+    "dates": np.dtype("<i4"),
+    "codes": np.dtype("<u2"),
+    "amounts": np.dtype("<i8"),
+}
+MAX_CATEGORIES = np.iinfo(np.uint16).max + 1
+
+
+def to_day_number(iso_date):
+    return (date.fromisoformat(str(iso_date)[:10]) - EPOCH).days
+
+
+def from_day_number(day):
+    return date.fromordinal(EPOCH.toordinal() + int(day)).isoformat()
+
+
+def to_minor_units(amount):
+    return int(round(float(amount) * MINOR_UNITS))
+
+
+def _column_path(base, column):
+    return f"{base}.{column}"
+
+
+def _categories_path(base):
+    return f"{base}.categories.json"
+
+
+def _load_categories(base):
+    path = _categories_path(base)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_categories(base, categories):
+    path = _categories_path(base)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(categories, f)
+    os.replace(tmp_path, path)
+
+
+def row_count(base):
+    """Rows present in every column of `base` (0 if it doesn't exist)."""
+    # A crash between column appends can leave one file a row longer than the
+    # others; only rows present in every column count.
+    return min(
+        os.path.getsize(_column_path(base, column)) // dtype.itemsize
+        if os.path.exists(_column_path(base, column)) else 0
+        for column, dtype in COLUMNS.items()
+    )
+
+
+class ColumnarLogWriter:
+    """Appends rows to a columnar log set, interning categories as uint16 codes."""
+
+    def __init__(self, base):
+        self.base = base
+        self.categories = _load_categories(base)
+        self.codes = {cat: i for i, cat in enumerate(self.categories)}
+        self._repair()
+
+    def _repair(self):
+        # Trim columns left uneven by an interrupted append so rows stay aligned.
+        n_rows = row_count(self.base)
+        for column, dtype in COLUMNS.items():
+            path = _column_path(self.base, column)
+            if os.path.exists(path) and os.path.getsize(path) != n_rows * dtype.itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(n_rows * dtype.itemsize)
+
+    def _code(self, category):
+        code = self.codes.get(category)
+        if code is None:
+            if len(self.categories) >= MAX_CATEGORIES:
+                raise ValueError("Too many categories for uint16 codes")
+            code = len(self.categories)
+            self.categories.append(category)
+            self.codes[category] = code
+            _save_categories(self.base, self.categories)
+        return code
+
+    def append_many(self, logs):
+        dates, codes, amounts = [], [], []
+        for log in logs:
+            dates.append(to_day_number(log["date"]))
+            codes.append(self._code(log["category"]))
+            amounts.append(to_minor_units(log["amount"]))
+        arrays = {
+            "dates": np.asarray(dates, dtype=COLUMNS["dates"]),
+            "codes": np.asarray(codes, dtype=COLUMNS["codes"]),
+            "amounts": np.asarray(amounts, dtype=COLUMNS["amounts"]),
+        }
+        for column, array in arrays.items():
+            with open(_column_path(self.base, column), "ab") as f:
+                f.write(array.tobytes())
+        return len(dates)
+
+    def append(self, log):
+        return self.append_many([log])
+
+
+class ColumnarLogs:
+    """Read-only, memory-mapped view of a columnar log set."""
+
+    def __init__(self, base):
+        self.base = base
+        self.categories = _load_categories(base)
+        self.n_rows = row_count(base)
+        for column, dtype in COLUMNS.items():
+            if self.n_rows:
+                array = np.memmap(_column_path(base, column), dtype=dtype, mode="r", shape=(self.n_rows,))
+            else:
+                array = np.empty(0, dtype=dtype)
+            setattr(self, column, array)
+
+    def __len__(self):
+        return self.n_rows
+
+    def category_code(self, category):
+        try:
+            return self.categories.index(category)
+        except ValueError:
+            return None
+
+    def category_totals(self):
+        """Per-category totals in rupees, computed with one bincount pass."""
+        totals = np.bincount(self.codes, weights=self.amounts, minlength=len(self.categories))
+        return {cat: totals[i] / MINOR_UNITS for i, cat in enumerate(self.categories)}
+
+    def range_sum(self, category, start, end):
+        """Sum of `category` between ISO dates `start` and `end`, inclusive."""
+        code = self.category_code(category)
+        if code is None:
+            return 0.0
+        mask = (self.codes == code) & (self.dates >= to_day_number(start)) & (self.dates <= to_day_number(end))
+        return int(self.amounts[mask].sum()) / MINOR_UNITS
+
+    def to_dataframe(self):
+        """Build the DataFrame shape used by time_analyzer and dsa_algos.
+
+        Each column is converted straight from the mapped arrays and handed
+        to pandas without a further copy.
+        """
+        import pandas as pd
+        return pd.DataFrame({
+            "date": pd.to_datetime(self.dates.astype("datetime64[D]")),
+            "category": np.asarray(self.categories, dtype=object)[self.codes],
+            "amount": self.amounts / MINOR_UNITS,
+        }, copy=False)
+
+
+def write_logs(logs, base):
+    """Write (or extend) a columnar log set from a list of log dicts."""
+    return ColumnarLogWriter(base).append_many(logs)
+
+
+def remove_logs(base):
+    for path in [_column_path(base, column) for column in COLUMNS] + [_categories_path(base)]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def convert_json_logs(json_path, base):
+    """Convert a JSON log list (data.json, finance_data.json["logs"]) to columnar form."""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    logs = data.get("logs", []) if isinstance(data, dict) else data
+    return write_logs(logs, base)
+
+
+def open_logs(base):
+    return ColumnarLogs(base)
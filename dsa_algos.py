@@ -1,45 +1,74 @@
 from collections import defaultdict
 import heapq
-import pandas as pd
 from datetime import datetime
+from aggregates import ensure_aggregates, monthly_totals, update_aggregates
+import metrics
+from sketches import top_expenses
 
 def build_prefix_sum(expenses_with_date):
-    df = pd.DataFrame(expenses_with_date)
-    df["date"] = pd.to_datetime(df["date"])
+    with metrics.span("finance_stage_seconds", stage="dataframe_build"):
+        if hasattr(expenses_with_date, "to_dataframe"):
+            # Columnar logs are already typed; skip the dict-to-frame parse
+            df = expenses_with_date.to_dataframe()
+        else:
+            import pandas as pd  # deferred: most app runs never build a DataFrame
+            df = pd.DataFrame(expenses_with_date)
+            df["date"] = pd.to_datetime(df["date"])
     df.sort_values(by="date", inplace=True)
     df["cumulative"] = df["amount"].cumsum()
     return df
 
 def monthly_expense_summary(df):
-    df["month"] = df["date"].dt.to_period("M")
-    return df.groupby("month")["amount"].sum().to_dict()
+    if isinstance(df, dict):
+        # Finance data dict: read the maintained monthly rollups
+        return monthly_totals(df)
+    month = df["date"].dt.to_period("M").rename("month")
+    return df.groupby(month)["amount"].sum().to_dict()
 
 def add_expense(data, category, amount):
+    aggregates = ensure_aggregates(data)
     if category not in data["expenses"]:
         data["expenses"][category] = []
     data["expenses"][category].append(amount)
+    update_aggregates(aggregates, category, amount)
     return data
 
-def total_expenses_by_category(expenses):
+# Pass the precomputed data["aggregates"] to skip re-summing every list
+# (a ledger.Ledger answers from its exact running paise totals)
+def total_expenses_by_category(expenses, aggregates=None):
+    if hasattr(expenses, "category_totals"):
+        return expenses.category_totals()
+    if aggregates is not None:
+        return {cat: agg["total"] for cat, agg in aggregates.items()}
     totals = {}
     for cat, values in expenses.items():
         totals[cat] = sum(values)
     return totals
 
-def highest_expense_category(expenses):
-    totals = total_expenses_by_category(expenses)
+def highest_expense_category(expenses, aggregates=None):
+    totals = total_expenses_by_category(expenses, aggregates)
     if not totals:
         return "No expenses yet."
     max_cat = max(totals, key=totals.get)
     return f"Your highest spending is in '{max_cat}' category: ₹{totals[max_cat]}"
 
-def lowest_expense_category(expenses):
-    totals = total_expenses_by_category(expenses)
+def lowest_expense_category(expenses, aggregates=None):
+    totals = total_expenses_by_category(expenses, aggregates)
     if not totals:
         return "No expenses yet."
     min_cat = min(totals, key=totals.get)
     return f"Your lowest spending is in '{min_cat}' category: ₹{totals[min_cat]}"
 
+# Largest k expenses; a finance data dict is answered from its per-month heaps
+def top_k_expenses(logs, k=10, start=None, end=None):
+    if isinstance(logs, dict):
+        return top_expenses(logs, k, start=start, end=end)
+    in_range = (
+        log for log in logs
+        if (start is None or log["date"] >= start) and (end is None or log["date"] <= end)
+    )
+    return heapq.nlargest(k, in_range, key=lambda log: float(log["amount"]))
+
 def suggest_savings_plan(income, total_expense):
     # Greedy algorithm: Save as much as possible
     possible_saving = income - total_expense
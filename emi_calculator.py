@@ -1,5 +1,11 @@
+# numpy is imported inside the vectorized functions below, so the scalar
+# calculators stay cheap to import.
+
 def calculate_emi(principal, rate, months):
     r = rate / (12 * 100)
+    if r == 0:
+        # Interest-free loan: the standard formula divides by zero
+        return round(principal / months, 2)
     emi = principal * r * ((1 + r)**months) / ((1 + r)**months - 1)
     return round(emi, 2)
 
@@ -7,3 +13,87 @@ def savings_goal_plan(goal_amount, current_savings, months):
     need_to_save = goal_amount - current_savings
     per_month = need_to_save / months if months > 0 else 0
     return round(per_month, 2)
+
+# -------------------- Vectorized loan engine --------------------
+# principal, rate (annual %) and months may be scalars or any arrays that
+# broadcast together, e.g. rates[:, None] against tenures[None, :] for a
+# rate x tenure sensitivity grid.
+
+def _broadcast(principal, rate, months):
+    import numpy as np
+    p, annual, n = np.broadcast_arrays(
+        np.asarray(principal, dtype=np.float64),
+        np.asarray(rate, dtype=np.float64),
+        np.asarray(months, dtype=np.float64),
+    )
+    return p, annual / (12 * 100), n
+
+def emi_grid(principal, rate, months):
+    """EMI for every broadcast combination; zero-rate loans are principal / months."""
+    import numpy as np
+    p, r, n = _broadcast(principal, rate, months)
+    growth = (1 + r) ** n
+    zero_rate = r == 0
+    # Substitute harmless values where r == 0 so the formula never divides by zero
+    safe_r = np.where(zero_rate, 1.0, r)
+    safe_growth = np.where(zero_rate, 2.0, growth)
+    return np.where(zero_rate, p / n, p * safe_r * safe_growth / (safe_growth - 1))
+
+def loan_summary(principal, rate, months):
+    """EMI, total payment and total interest arrays (no prepayments)."""
+    p, _, n = _broadcast(principal, rate, months)
+    emi = emi_grid(principal, rate, months)
+    total_payment = emi * n
+    return {"emi": emi, "total_payment": total_payment, "total_interest": total_payment - p}
+
+def amortization_schedule(principal, rate, months, prepayments=None):
+    """
+    Month-by-month schedules for every broadcast loan scenario.
+
+    `prepayments` is either a {month: amount} dict (1-based months, applied
+    to every scenario) or an array broadcastable to (..., max_months). A
+    prepayment reduces the outstanding balance and keeps the EMI unchanged,
+    so the loan closes early.
+
+    Returns a dict of arrays shaped (..., max_months) -- payment, interest,
+    principal, prepayment, balance -- plus per-scenario emi, total_interest
+    and months_to_close.
+    """
+    import numpy as np
+    p, r, n = _broadcast(principal, rate, months)
+    emi = emi_grid(principal, rate, months)
+    shape = p.shape
+    max_n = int(n.max()) if n.size else 0
+
+    extra = np.zeros(shape + (max_n,))
+    if isinstance(prepayments, dict):
+        for month, amount in prepayments.items():
+            if 1 <= month <= max_n:
+                extra[..., month - 1] = amount
+    elif prepayments is not None:
+        extra = np.broadcast_to(np.asarray(prepayments, dtype=np.float64), shape + (max_n,))
+
+    columns = {name: np.zeros(shape + (max_n,)) for name in ("payment", "interest", "principal", "prepayment", "balance")}
+    balance = p.copy()
+    for k in range(max_n):
+        active = (balance > 1e-9) & (k < n)
+        interest = balance * r
+        # The last scheduled payment (or a smaller remaining balance) settles the loan
+        due = balance + interest
+        payment = np.where(k == n - 1, due, np.minimum(emi, due))
+        payment = np.where(active, payment, 0.0)
+        principal_paid = np.where(active, payment - interest, 0.0)
+        balance = balance - principal_paid
+        prepaid = np.where(active, np.minimum(extra[..., k], balance), 0.0)
+        balance = balance - prepaid
+
+        columns["payment"][..., k] = payment
+        columns["interest"][..., k] = np.where(active, interest, 0.0)
+        columns["principal"][..., k] = principal_paid
+        columns["prepayment"][..., k] = prepaid
+        columns["balance"][..., k] = balance
+
+    columns["emi"] = emi
+    columns["total_interest"] = columns["interest"].sum(axis=-1)
+    columns["months_to_close"] = (columns["payment"] > 0).sum(axis=-1)
+    return columns
@@ -1,26 +1,19 @@
 # family.py
 
-import json
-import os
+import storage
 
-DATA_FILE = "finance_data.json"
+DATA_FILE = storage.DATA_FILE
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w") as f:
-            json.dump({"income": 0, "savings": 0, "expenses": {}, "logs": [], "family": []}, f)
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    # storage snapshots are shared by every reader: default on a copy
+    data = dict(storage.load_data())
+    data.setdefault("family", [])
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    storage.save_data(data)
 
 def add_family_member(name, age, relation, is_earning):
-    data = load_data()
-    if "family" not in data:
-        data["family"] = []
-
     member = {
         "name": name,
         "age": age,
@@ -28,10 +21,9 @@ def add_family_member(name, age, relation, is_earning):
         "is_earning": is_earning
     }
 
-    data["family"].append(member)
-    save_data(data)
+    storage.record_family_member(member)
     return f"✅ Added {relation} '{name}' to family profile."
 
 def get_family_members():
     data = load_data()
-    return data.get("family", [])
+    return list(data.get("family", []))
@@ -1,5 +1,6 @@
 from datetime import datetime
 import json
+from aggregates import category_totals, total_expense as aggregate_total_expense
 
 def suggest_family_budget_plan(data):
     """
@@ -14,7 +15,7 @@ def suggest_family_budget_plan(data):
     income = data.get("income", 0)
     spouse_income = data.get("family_profile", {}).get("spouse_income", 0)
     total_income = income + spouse_income
-    total_expense = sum(sum(v) for v in data.get("expenses", {}).values())
+    total_expense = aggregate_total_expense(data)
 
     recommended_saving = round(total_income * 0.20)
     recommended_needs = round(total_income * 0.50)
@@ -89,7 +90,7 @@ def suggest_emergency_fund_plan(data):
     Returns:
         str: Formatted emergency fund recommendation
     """
-    monthly_expense = sum(sum(v) for v in data.get("expenses", {}).values())
+    monthly_expense = aggregate_total_expense(data)
     emergency_fund_goal = monthly_expense * 6
     current_savings = data.get("savings", 0)
     
@@ -186,8 +187,8 @@ def build_llm_prompt(data):
     - Children Ages: {", ".join(str(age) for age in family.get("children", [])) or "None"}
     - Dependents: {", ".join(family.get("dependents", [])) or "None"}
     
-    **Monthly Expenses**:
-    {json.dumps(data.get("expenses", {}), indent=4)}
+    **Monthly Expenses (totals by category)**:
+    {json.dumps(category_totals(data), indent=4)}
     
     Please provide a comprehensive financial plan covering:
     1. Budget allocation (50/30/20 rule customization)
@@ -199,4 +200,42 @@ def build_llm_prompt(data):
     
     Provide the advice in markdown format with clear sections.
     """
-    return prompt
\ No newline at end of file
+    return prompt
+
+SECTION_TOPICS = {
+    "education": "Child education planning: target corpus per child, monthly SIP amounts and suitable instruments",
+    "retirement": "Retirement planning for both spouses: corpus needed, monthly contributions, NPS/PPF/EPF mix",
+    "insurance": "Insurance needs assessment: term life cover, health cover for the family and dependents",
+}
+
+def build_section_prompt(data, section):
+    """
+    Generates a focused prompt for a single plan section.
+    
+    Args:
+        data (dict): Dictionary containing family financial data
+        section (str): One of the keys of SECTION_TOPICS
+        
+    Returns:
+        str: Prompt asking the LLM for advice on that section only
+    """
+    family = data.get("family_profile", {})
+    
+    prompt = f"""
+    I'm a financial advisor. Here is the family's profile:
+    
+    **Monthly Income**: ₹{data.get("income", 0):,}
+    **Spouse Income**: ₹{family.get("spouse_income", 0):,}
+    **Current Savings**: ₹{data.get("savings", 0):,}
+    **Monthly Expenses**: ₹{aggregate_total_expense(data):,}
+    
+    **Family Status**:
+    - Married: {"Yes" if family.get("married") else "No"}
+    - Children Ages: {", ".join(str(age) for age in family.get("children", [])) or "None"}
+    - Dependents: {", ".join(family.get("dependents", [])) or "None"}
+    
+    Focus only on: {SECTION_TOPICS[section]}.
+    
+    Provide concise advice in markdown format.
+    """
+    return prompt
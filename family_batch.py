@@ -0,0 +1,246 @@
+# family_batch.py
+#
+# Vectorized version of family_advisor for running the advice pipeline over
+# many households at once (e.g. every client household each night).
+#
+# Households are given as a table of NumPy columns instead of one data dict
+# at a time; every section is computed with array operations, and very large
+# tables are split into shards across a process pool. Numbers match the
+# scalar functions in family_advisor, and format_household() turns one row
+# of the result back into the exact dict generate_family_advice_summary
+# returns (minus the timestamp).
+#
+# Money columns stay int64 unless some input is a float. A float column also
+# carries a "<key>_is_float" mask of the rows that really were floats, so a
+# household whose own amounts are ints renders "1,500" as the scalar path
+# does, not "1,500.0".
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aggregates import total_expense
+
+EDUCATION_TARGET = 500000
+EDUCATION_INFLATION = 1.03
+COLLEGE_AGE = 18
+SHARD_SIZE = 250_000
+
+
+def _money_column(values):
+    is_float = np.asarray([isinstance(v, float) for v in values], dtype=bool)
+    return np.asarray(values, dtype=np.float64 if is_float.any() else np.int64), is_float
+
+
+def households_from_records(records):
+    """Build a household table from finance_data-style dicts (left unmodified)."""
+    n = len(records)
+    max_children = max((len(r.get("family_profile", {}).get("children", [])) for r in records), default=0)
+    children = np.full((n, max_children), -1, dtype=np.int64)
+    for i, record in enumerate(records):
+        ages = record.get("family_profile", {}).get("children", [])
+        children[i, :len(ages)] = ages
+    table = {
+        "married": np.asarray([bool(r.get("family_profile", {}).get("married", False)) for r in records]),
+        # Ages padded with -1 to a rectangular (households x max children) array
+        "children": children,
+    }
+    columns = {
+        "income": [r.get("income", 0) for r in records],
+        "spouse_income": [r.get("family_profile", {}).get("spouse_income", 0) for r in records],
+        "savings": [r.get("savings", 0) for r in records],
+        # On a shallow copy, so the aggregates it builds stay out of the record
+        "total_expense": [total_expense(dict(r)) for r in records],
+    }
+    for key, values in columns.items():
+        table[key], table[f"{key}_is_float"] = _money_column(values)
+    return table
+
+
+def _round(values):
+    # Python's round() and np.rint both round half to even
+    return np.rint(values).astype(np.int64)
+
+
+def _is_float(table, key):
+    # Tables built by hand may leave out the masks; then the dtype decides
+    values = np.asarray(table[key])
+    mask = table.get(f"{key}_is_float")
+    if mask is None:
+        return np.full(values.shape, np.issubdtype(values.dtype, np.floating))
+    return np.asarray(mask, dtype=bool)
+
+
+def _advise(table):
+    income = np.asarray(table["income"])
+    spouse_income = np.asarray(table["spouse_income"])
+    savings = np.asarray(table["savings"])
+    expense = np.asarray(table["total_expense"])
+    married = np.asarray(table["married"], dtype=bool)
+    children = np.asarray(table["children"])
+    income_float, spouse_float = _is_float(table, "income"), _is_float(table, "spouse_income")
+    savings_float, expense_float = _is_float(table, "savings"), _is_float(table, "total_expense")
+
+    # Budget (50/30/20)
+    total_income = income + spouse_income
+    has_income = total_income > 0
+    safe_income = np.where(has_income, total_income, 1)
+    savings_rate = np.where(has_income, np.rint((total_income - expense) / safe_income * 100), 0)
+    needs = _round(total_income * 0.50)
+    wants = _round(total_income * 0.30)
+
+    # Child education, one column per child slot
+    has_child = children >= 0
+    years_left = np.where(has_child, np.maximum(COLLEGE_AGE - children, 0), 0)
+    inflated_target = _round(EDUCATION_TARGET * (EDUCATION_INFLATION ** years_left.astype(np.float64)))
+    monthly_saving = np.where(years_left > 0, _round(inflated_target / np.maximum(years_left * 12, 1)), 0)
+
+    # Emergency fund
+    emergency_goal = expense * 6
+
+    # Spouse retirement
+    retirement_monthly = _round(spouse_income * 0.15)
+
+    return {
+        "total_income": total_income,
+        "total_income_is_float": income_float | spouse_float,
+        "total_expense": expense,
+        "total_expense_is_float": expense_float,
+        "has_income": has_income,
+        "savings_rate": savings_rate.astype(np.int64),
+        "needs": needs,
+        "wants": wants,
+        "savings_target": _round(total_income * 0.20),
+        "within_budget": expense <= needs + wants,
+        "children": children,
+        "years_left": years_left,
+        "inflated_target": inflated_target,
+        "monthly_saving": monthly_saving,
+        "savings": savings,
+        "savings_is_float": savings_float,
+        "emergency_goal": emergency_goal,
+        "emergency_goal_is_float": expense_float,
+        "emergency_funded": savings >= emergency_goal,
+        "emergency_shortfall": emergency_goal - savings,
+        "emergency_shortfall_is_float": expense_float | savings_float,
+        "married": married,
+        "spouse_income": spouse_income,
+        "retirement_monthly": retirement_monthly,
+        "retirement_annual": retirement_monthly * 12,
+    }
+
+
+def _shard(table, start, stop):
+    return {key: np.asarray(values)[start:stop] for key, values in table.items()}
+
+
+def generate_family_advice_batch(table, workers=None, shard_size=SHARD_SIZE):
+    """
+    Compute every advice section for a table of households.
+
+    Tables larger than `shard_size` rows are split and processed in a
+    ProcessPoolExecutor (`workers=1` forces a single process).
+    Returns a dict of result columns, one row per household.
+    """
+    n = len(table["income"])
+    if n <= shard_size or workers == 1:
+        return _advise(table)
+
+    shards = [_shard(table, start, min(start + shard_size, n)) for start in range(0, n, shard_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_advise, shards))
+    merged = {}
+    for key in parts[0]:
+        if key == "children" or parts[0][key].ndim == 2:
+            # Shards may differ in padded width; re-pad to the widest
+            width = max(part[key].shape[1] for part in parts)
+            fill = -1 if key == "children" else 0
+            merged[key] = np.concatenate([
+                np.pad(part[key], ((0, 0), (0, width - part[key].shape[1])), constant_values=fill)
+                for part in parts
+            ])
+        else:
+            merged[key] = np.concatenate([part[key] for part in parts])
+    return merged
+
+
+def format_household(result, i):
+    """Render row `i` exactly like generate_family_advice_summary (without timestamp)."""
+    r = {key: values[i] for key, values in result.items()}
+
+    def item(value):
+        # NumPy scalars -> Python int/float/bool so formatting matches
+        return value.item() if hasattr(value, "item") else value
+
+    def money(key):
+        # The type the scalar path would have computed for this household
+        value = item(r[key])
+        return float(value) if item(r.get(f"{key}_is_float", isinstance(value, float))) else int(value)
+
+    total_income, total_expense_ = money("total_income"), money("total_expense")
+    summary = {
+        "📊 Budget Advice": {
+            "total_income": total_income,
+            "total_expense": total_expense_,
+            "current_savings_rate": f"{item(r['savings_rate'])}%" if item(r["has_income"]) else "0%",
+            "recommended_budget": {
+                "needs (50%)": item(r["needs"]),
+                "wants (30%)": item(r["wants"]),
+                "savings (20%)": item(r["savings_target"]),
+            },
+            "budget_status": "Within recommended limits" if item(r["within_budget"]) else "Over budget",
+        }
+    }
+
+    education = []
+    for slot, age in enumerate(r["children"], start=1):
+        age = item(age)
+        if age < 0:
+            break
+        years_left = item(r["years_left"][slot - 1])
+        if years_left > 0:
+            monthly_saving = item(r["monthly_saving"][slot - 1])
+            inflated_target = item(r["inflated_target"][slot - 1])
+            education.append(
+                f"👶 Child {slot} (Age {age}): "
+                f"Save ₹{monthly_saving:,}/month "
+                f"(₹{inflated_target:,} target in {years_left} years)"
+            )
+        else:
+            education.append(
+                f"👶 Child {slot} (Age {age}): "
+                "Already at or past college age. "
+                "Consider continuing education or vocational training funds."
+            )
+    if not education:
+        education.append("ℹ️ No children in family profile for education planning")
+    summary["🎓 Child Education"] = education
+
+    savings, goal = money("savings"), money("emergency_goal")
+    if item(r["emergency_funded"]):
+        summary["💼 Emergency Fund"] = f"✅ Emergency Fund: ₹{savings:,} (Fully funded! Goal: ₹{goal:,})"
+    else:
+        summary["💼 Emergency Fund"] = (
+            f"💼 Recommended Emergency Fund: ₹{goal:,} (6x monthly expenses)\n"
+            f"Current savings: ₹{savings:,}\n"
+            f"Additional ₹{money('emergency_shortfall'):,} needed to reach goal"
+        )
+
+    if item(r["married"]):
+        if item(r["spouse_income"]) > 0:
+            monthly, annual = item(r["retirement_monthly"]), item(r["retirement_annual"])
+            summary["👵 Spouse Retirement"] = (
+                f"👩 Spouse Retirement Plan:\n"
+                f"- Save ₹{monthly:,}/month (~15% of income)\n"
+                f"- ₹{annual:,}/year towards retirement\n"
+                f"- Consider NPS or PPF for tax benefits"
+            )
+        else:
+            summary["👵 Spouse Retirement"] = (
+                "👩 Spouse Retirement Considerations:\n"
+                "- Spouse has no income\n"
+                "- Consider joint retirement planning\n"
+                "- Explore voluntary PF contributions"
+            )
+
+    return summary
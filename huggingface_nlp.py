@@ -1,7 +1,35 @@
-from transformers import pipeline
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+import threading
+
+MODEL_NAME = "facebook/bart-large-mnli"
+INTENTS = ["add_expense", "show_expenses", "savings_check", "suggestion", "goal_planning", "emi_calculation"]
+
+# The pipeline is gigabytes of weights, so it is built on first use (or by
+# prewarm() in a background thread) instead of at import time.
+_classifier = None
+_lock = threading.Lock()
+
+def get_classifier():
+    global _classifier
+    with _lock:
+        if _classifier is None:
+            from transformers import pipeline
+            _classifier = pipeline("zero-shot-classification", model=MODEL_NAME)
+    return _classifier
+
+def prewarm():
+    thread = threading.Thread(target=get_classifier, name="hf-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+def classify(texts, candidate_labels=INTENTS):
+    # Batched: one pipeline call for many utterances -> [(label, score), ...]
+    texts = list(texts)
+    if not texts:
+        return []
+    results = get_classifier()(texts, candidate_labels=candidate_labels)
+    if isinstance(results, dict):
+        results = [results]
+    return [(r["labels"][0], r["scores"][0]) for r in results]
 
 def get_intent_hf(user_input):
-    intents = ["add_expense", "show_expenses", "savings_check", "suggestion", "goal_planning", "emi_calculation"]
-    result = classifier(user_input, candidate_labels=intents)
-    return result["labels"][0]
+    return classify([user_input])[0][0]
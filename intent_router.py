@@ -0,0 +1,167 @@
+# intent_router.py
+#
+# Tiered intent detection. The regex matcher in nlp_helper answers the usual
+# scripted phrases in microseconds; only its misses go to the zero-shot
+# transformer. Misses are memoized, and concurrent misses are collected by a
+# single worker thread and classified in one batched model call.
+
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from nlp_helper import extract_intent_entities
+
+# Zero-shot labels that mean the same thing as a chatbot intent
+LABEL_TO_INTENT = {
+    "show_expenses": "spending_analysis",
+}
+
+CONFIDENCE_THRESHOLD = 0.5
+MEMO_SIZE = 4096
+BATCH_SIZE = 16
+BATCH_WAIT = 0.01   # seconds to wait for more misses before running a batch
+ROUTE_TIMEOUT = 30  # seconds a caller waits for the model (incl. first load)
+
+
+def _default_model(texts):
+    from huggingface_nlp import classify
+    return classify(texts)
+
+
+class IntentRouter:
+    """`model` takes a list of texts and returns [(label, score), ...]."""
+
+    def __init__(self, model=None, threshold=CONFIDENCE_THRESHOLD, memo_size=MEMO_SIZE,
+                 batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, timeout=ROUTE_TIMEOUT):
+        self.model = model or _default_model
+        self.threshold = threshold
+        self.memo_size = memo_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.timeout = timeout
+        self.stats = {"regex": 0, "memo": 0, "model": 0}
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # -------------------- memo --------------------
+
+    def _memo_get(self, key):
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        return None
+
+    def _memo_put(self, key, value):
+        with self._memo_lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    # -------------------- batching worker --------------------
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="intent-router", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._pending.get(timeout=self.batch_wait))
+            except queue.Empty:
+                pass
+            texts = [text for text, _ in batch]
+            try:
+                results = self.model(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (text, future), (label, score) in zip(batch, results):
+                intent = LABEL_TO_INTENT.get(label, label) if score >= self.threshold else "unknown"
+                self._memo_put(text, intent)
+                future.set_result(intent)
+            # A model that returns fewer results than texts must not leave the
+            # rest waiting out the timeout; they get the rule-based answer
+            # and stay out of the memo so a later call can retry the model.
+            for text, future in batch[len(results):]:
+                future.set_result(extract_intent_entities(text)[0])
+
+    def _submit(self, text):
+        future = Future()
+        self._pending.put((text, future))
+        self._ensure_worker()
+        return future
+
+    def prewarm(self):
+        """Load the model in the background so the first miss doesn't pay for it."""
+        self._submit("hello")
+
+    # -------------------- routing --------------------
+
+    def route(self, user_input):
+        """Same contract as nlp_helper.extract_intent_entities."""
+        intent, entities = extract_intent_entities(user_input)
+        if intent != "unknown":
+            self.stats["regex"] += 1
+            return intent, entities
+
+        key = user_input.strip().lower()
+        intent = self._memo_get(key)
+        if intent is not None:
+            self.stats["memo"] += 1
+            return intent, {}
+
+        self.stats["model"] += 1
+        try:
+            return self._submit(key).result(timeout=self.timeout), {}
+        except Exception:
+            # Model unavailable or still loading: behave like the regex tier.
+            return "unknown", {}
+
+    def route_batch(self, texts):
+        """Route many texts; every regex miss shares one batched model pass."""
+        results = [None] * len(texts)
+        futures, by_key = {}, {}
+        for i, text in enumerate(texts):
+            intent, entities = extract_intent_entities(text)
+            if intent != "unknown":
+                results[i] = (intent, entities)
+                continue
+            key = text.strip().lower()
+            memo = self._memo_get(key)
+            if memo is not None:
+                results[i] = (memo, {})
+            else:
+                if key not in by_key:
+                    by_key[key] = self._submit(key)
+                futures[i] = by_key[key]
+        for i, future in futures.items():
+            try:
+                results[i] = (future.result(timeout=self.timeout), {})
+            except Exception:
+                results[i] = ("unknown", {})
+        return results
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+def get_router():
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = IntentRouter()
+    return _default_router
+
+def route_intent(user_input):
+    return get_router().route(user_input)
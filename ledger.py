@@ -0,0 +1,284 @@
+# ledger.py
+#
+# Compact in-memory expense ledger.
+#
+# Rows live in parallel typed columns (the same layout as columnar_logs, but
+# in RAM via the stdlib array module):
+#   days    int32   days since 1970-01-01 (NO_DATE for undated entries)
+#   codes   uint16  index into ledger.categories
+#   paise   int64   amount in paise
+# plus one byte per row remembering whether the amount came in as an int,
+# so JSON written back out is identical to what was read. A row costs 15
+# bytes instead of the ~275 of a log dict (measured on synthetic logs), and
+# totals are integer paise, so they are exact (sum() over floats like
+# 978.94 drifts).
+#
+# storage keeps finance_data.json's "expenses" and "logs" in memory as
+# Ledgers and converts back to the JSON schema only when it writes a
+# snapshot. Rows read back as Expense objects that also answer
+# log["amount"] / log.get("date"), so code written against log dicts
+# works unchanged.
+#
+#   ledger = Ledger.from_logs(json.load(open("data.json")))
+#   ledger.add_expense("food", 120.5, "2025-04-01")
+#   ledger.category_totals()          # {"food": 117432.17, ...}
+#   ledger.to_logs()                  # back to the JSON schema
+
+import copy
+from array import array
+from datetime import date
+
+EPOCH = date(1970, 1, 1)
+MINOR_UNITS = 100
+NO_DATE = -(2 ** 31)
+MAX_CATEGORIES = 2 ** 16
+
+
+def to_paise(amount, exact=True):
+    """Integer paise; ValueError if `amount` has finer precision, unless exact=False rounds it."""
+    paise = int(round(amount * MINOR_UNITS))
+    if exact and paise / MINOR_UNITS != amount:
+        raise ValueError(f"Amount {amount!r} is not a whole number of paise")
+    return paise
+
+
+def to_rupees(paise):
+    """Rupees for integer `paise`; whole-rupee totals stay ints, as sum() over int amounts would give."""
+    return paise // MINOR_UNITS if paise % MINOR_UNITS == 0 else paise / MINOR_UNITS
+
+
+def _to_day(iso_date):
+    if iso_date is None:
+        return NO_DATE
+    return (date.fromisoformat(str(iso_date)[:10]) - EPOCH).days
+
+
+def _from_day(day):
+    if day == NO_DATE:
+        return None
+    return date.fromordinal(EPOCH.toordinal() + day).isoformat()
+
+
+class Expense:
+    """One ledger row, materialized on access."""
+
+    __slots__ = ("date", "category", "amount")
+
+    def __init__(self, date, category, amount):
+        self.date = date
+        self.category = category
+        self.amount = amount
+
+    def __repr__(self):
+        return f"Expense(date={self.date!r}, category={self.category!r}, amount={self.amount!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Expense) and (self.date, self.category, self.amount) == (
+            other.date, other.category, other.amount
+        )
+
+    # Read like a log dict: expense["amount"], expense.get("date")
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_log(self):
+        return {"date": self.date, "category": self.category, "amount": self.amount}
+
+
+class Ledger:
+    def __init__(self, exact=True):
+        # exact=False rounds sub-paisa amounts instead of rejecting them
+        self.exact = exact
+        self.categories = []
+        self._codes = {}
+        self._totals = []  # running paise total per code
+        self._counts = []  # rows per code
+        self.days = array("i")
+        self.codes = array("H")
+        self.paise = array("q")
+        self._whole = bytearray()
+        self._derived = {}
+        self._len = None  # fixed row count of a read-only view
+
+    def code(self, category):
+        """Interned uint16 code for `category`, assigned on first use."""
+        code = self._codes.get(category)
+        if code is None:
+            if len(self.categories) >= MAX_CATEGORIES:
+                raise ValueError("Too many categories for uint16 codes")
+            code = self._codes[category] = len(self.categories)
+            self.categories.append(category)
+            self._totals.append(0)
+            self._counts.append(0)
+        return code
+
+    def add_expense(self, category, amount, date=None):
+        """Append one row; returns the amount as stored."""
+        if self.read_only:
+            raise TypeError("Can't add to a read-only ledger view")
+        code = self.code(category)
+        paise = to_paise(amount, self.exact)
+        self.days.append(_to_day(date))
+        self.codes.append(code)
+        self.paise.append(paise)
+        self._whole.append(isinstance(amount, int))
+        self._totals[code] += paise
+        self._counts[code] += 1
+        return self._amount(len(self) - 1)
+
+    def __len__(self):
+        return len(self.paise) if self._len is None else self._len
+
+    # -------------------- Views --------------------
+
+    @property
+    def read_only(self):
+        return self._len is not None
+
+    def view(self):
+        """Read-only view of the rows so far; later appends here don't show up in it.
+
+        Shares the row arrays (rows are only ever appended, so the first
+        len(view) entries never change) and the derived-state memo, so a
+        view costs O(categories) however long the ledger is.
+        """
+        view = copy.copy(self)
+        view._len = len(self)
+        view.categories = list(self.categories)
+        view._totals = list(self._totals)
+        view._counts = list(self._counts)
+        return view
+
+    def copy(self):
+        """Independent, writable copy (of a view or a ledger)."""
+        n = len(self)
+        ledger = Ledger(self.exact)
+        ledger.categories = list(self.categories)
+        ledger._codes = {cat: code for code, cat in enumerate(ledger.categories)}
+        ledger._totals = list(self._totals) + [0] * (len(ledger.categories) - len(self._totals))
+        ledger._counts = list(self._counts) + [0] * (len(ledger.categories) - len(self._counts))
+        ledger.days = self.days[:n]
+        ledger.codes = self.codes[:n]
+        ledger.paise = self.paise[:n]
+        ledger._whole = self._whole[:n]
+        return ledger
+
+    def _amount(self, i):
+        paise = self.paise[i]
+        return paise // MINOR_UNITS if self._whole[i] else paise / MINOR_UNITS
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ledger index out of range")
+        return Expense(_from_day(self.days[i]), self.categories[self.codes[i]], self._amount(i))
+
+    def __iter__(self):
+        return self.rows()
+
+    def rows(self, start=0, stop=None):
+        """Expense rows start..stop-1, materialized one at a time."""
+        stop = len(self) if stop is None else stop
+        for i in range(start, stop):
+            yield self[i]
+
+    # -------------------- Derived state --------------------
+
+    def derived(self, key, extend):
+        """Memoized `extend(previous, rows)` over this ledger.
+
+        Values are dicts whose "rows" says how many ledger rows they cover.
+        `previous` is the last value built for `key` (None the first time)
+        and `rows` the Expense rows after it; `extend` must return a new
+        value and leave `previous` untouched, since readers may still hold
+        it. Nothing is persisted: a freshly loaded ledger rebuilds from its
+        rows on first use.
+        """
+        n = len(self)
+        previous = self._derived.get(key)
+        if previous is not None and previous["rows"] == n:
+            return previous
+        if previous is not None and previous["rows"] > n:
+            previous = None
+        value = extend(previous, self.rows(previous["rows"] if previous else 0, n))
+        current = self._derived.get(key)
+        if current is None or current["rows"] < value["rows"]:
+            self._derived[key] = value
+        return value
+
+    # -------------------- Totals --------------------
+
+    def totals_paise(self):
+        return dict(zip(self.categories, self._totals))
+
+    def category_totals(self):
+        """Per-category totals in rupees; exact to the paisa."""
+        return {cat: to_rupees(total) for cat, total in zip(self.categories, self._totals)}
+
+    def category_counts(self):
+        return dict(zip(self.categories, self._counts))
+
+    def total(self):
+        return to_rupees(sum(self._totals))
+
+    def nbytes(self):
+        return (self.days.itemsize + self.codes.itemsize + self.paise.itemsize + 1) * len(self)
+
+    # -------------------- JSON schema conversion --------------------
+
+    @classmethod
+    def from_logs(cls, logs, exact=True):
+        """From a log list: data.json or finance_data.json["logs"]."""
+        return cls(exact).extend_logs(logs)
+
+    def to_logs(self):
+        return [expense.to_log() for expense in self]
+
+    @classmethod
+    def from_expenses(cls, expenses, exact=True):
+        """From finance_data.json["expenses"] ({category: [amount, ...]}); rows are undated."""
+        ledger = cls(exact)
+        for category, amounts in expenses.items():
+            ledger.code(category)  # keeps empty categories
+            for amount in amounts:
+                ledger.add_expense(category, amount)
+        return ledger
+
+    def to_expenses(self):
+        expenses = {cat: [] for cat in self.categories}
+        for i in range(len(self)):
+            expenses[self.categories[self.codes[i]]].append(self._amount(i))
+        return expenses
+
+    def extend_logs(self, logs):
+        for log in logs:
+            self.add_expense(log["category"], log["amount"], log["date"])
+        return self
+
+    def columns(self, start=0):
+        """(day numbers, paise) of rows start.. as array copies; the columnar_logs encoding."""
+        n = len(self)
+        return self.days[start:n], self.paise[start:n]
+
+    def to_dataframe(self):
+        """Build the DataFrame shape used by time_analyzer and dsa_algos."""
+        import numpy as np
+        import pandas as pd
+        # Slicing first copies the live rows, so no buffer of an array that
+        # may still be appended to is left exported
+        n = len(self)
+        days = np.frombuffer(self.days[:n], dtype=np.int32)
+        return pd.DataFrame({
+            "date": pd.to_datetime(np.where(days == NO_DATE, np.iinfo(np.int64).min, days).astype("datetime64[D]")),
+            "category": np.asarray(self.categories, dtype=object)[np.frombuffer(self.codes[:n], dtype=np.uint16)],
+            "amount": np.frombuffer(self.paise[:n], dtype=np.int64) / MINOR_UNITS,
+        }, copy=False)
+
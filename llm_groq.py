@@ -1,32 +1,199 @@
 # llm_groq.py
-import requests
+import json
+import random
+import threading
+import time
 import os
-from dotenv import load_dotenv
+from llm_cache import ResponseCache, cache_key
+import metrics
 
-# Load environment variables from .env file
-load_dotenv()
+# requests and python-dotenv are imported when the first client is built,
+# not when the app starts.
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")  # Will now be loaded from .env
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 
-def call_groq_llm(prompt, model="llama3-8b-8192", max_tokens=512):
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": max_tokens,
-        "temperature": 0.7
-    }
+
+def groq_api_key():
+    # Load environment variables from .env file
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("GROQ_API_KEY")
+
+
+class GroqClient:
+    """Keep-alive, timeout-bounded client for the Groq chat completions API.
+
+    Transient failures (429/5xx, connection errors) are retried with
+    exponential backoff plus jitter, honouring Retry-After when the server
+    sends one. `base_url` can point at a local stub server for testing.
+    """
+
+    def __init__(self, api_key=None, base_url=GROQ_BASE_URL, connect_timeout=5, read_timeout=60,
+                 max_retries=3, backoff_base=0.5, backoff_max=8, pool_size=10):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key if api_key is not None else groq_api_key()
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transient_errors = (requests.ConnectionError, requests.Timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # "Full jitter": uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, payload, stream=False):
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+            except self._transient_errors:
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                response.close()
+                time.sleep(self._backoff(attempt, response))
+                continue
+            response.raise_for_status()
+            return response
+
+    @staticmethod
+    def _payload(prompt, model, max_tokens, temperature, stream=False):
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    @staticmethod
+    def _record_usage(model, usage):
+        if usage:
+            metrics.inc("finance_llm_tokens_total", usage.get("prompt_tokens", 0), model=model, kind="prompt")
+            metrics.inc("finance_llm_tokens_total", usage.get("completion_tokens", 0), model=model, kind="completion")
+
+    def complete(self, prompt, model="llama3-8b-8192", max_tokens=512, temperature=0.7):
+        response = self._post(self._payload(prompt, model, max_tokens, temperature))
+        body = response.json()
+        self._record_usage(model, body.get("usage"))
+        return body["choices"][0]["message"]["content"]
+
+    def stream(self, prompt, model="llama3-8b-8192", max_tokens=512, temperature=0.7):
+        """Yield content fragments as the server sends them (OpenAI-style SSE)."""
+        response = self._post(self._payload(prompt, model, max_tokens, temperature, stream=True), stream=True)
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                # Groq reports usage on the last chunk under x_groq
+                self._record_usage(model, chunk.get("usage") or chunk.get("x_groq", {}).get("usage"))
+                if not chunk.get("choices"):
+                    continue
+                delta = chunk["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+
+_default_client = None
+_response_cache = None
+# run_plan's pool threads make their first calls at the same moment; one
+# lock keeps them from each building (and leaking) a client or cache
+_init_lock = threading.Lock()
+
+def get_client():
+    global _default_client
+    if _default_client is None:
+        with _init_lock:
+            if _default_client is None:
+                _default_client = GroqClient()
+    return _default_client
+
+def get_response_cache():
+    # Shared on-disk response cache; identical requests are answered from
+    # here. Opened on first use so importing this module creates no files.
+    global _response_cache
+    if _response_cache is None:
+        with _init_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache()
+    return _response_cache
+
+def call_groq_llm(prompt, model="llama3-8b-8192", max_tokens=512, temperature=0.7,
+                  use_cache=True, refresh=False):
+    # use_cache=False bypasses the cache entirely; refresh=True skips the
+    # lookup but still stores the fresh answer.
+    key = cache_key(model, prompt, max_tokens, temperature)
+    if use_cache and not refresh:
+        cached = get_response_cache().get(key)
+        metrics.inc("finance_llm_cache_requests_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        with metrics.span("finance_llm_request_seconds", model=model, mode="complete"):
+            content = get_client().complete(prompt, model, max_tokens, temperature)
     except Exception as e:
+        metrics.inc("finance_llm_errors_total", model=model)
         return f"❌ Error: {str(e)}"
+
+    if use_cache:
+        get_response_cache().put(key, content)
+    return content
+
+def stream_groq_llm(prompt, model="llama3-8b-8192", max_tokens=512, temperature=0.7,
+                    use_cache=True, refresh=False):
+    # Streaming counterpart of call_groq_llm, suitable for st.write_stream
+    key = cache_key(model, prompt, max_tokens, temperature)
+    if use_cache and not refresh:
+        cached = get_response_cache().get(key)
+        metrics.inc("finance_llm_cache_requests_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    try:
+        with metrics.span("finance_llm_request_seconds", model=model, mode="stream"):
+            for token in get_client().stream(prompt, model, max_tokens, temperature):
+                parts.append(token)
+                yield token
+    except Exception as e:
+        metrics.inc("finance_llm_errors_total", model=model)
+        yield f"\n\n❌ Error: {str(e)}"
+        return
+
+    if use_cache:
+        get_response_cache().put(key, "".join(parts))
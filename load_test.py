@@ -0,0 +1,77 @@
+# load_test.py
+#
+# Concurrency load test for the per-user journal store. Several processes,
+# each running several threads, append expenses to a handful of users at
+# once; afterwards every user's shard is re-read from disk and the number of
+# logged expenses must equal the number written (zero lost updates).
+#
+#   python load_test.py --processes 4 --threads 4 --writes 250 --users 3
+
+import argparse
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+import storage
+
+
+def _worker(args):
+    data_dir, worker, threads, writes, users, fsync = args
+    storage.DATA_DIR = data_dir
+
+    def write(thread):
+        for i in range(writes):
+            user = f"user-{(worker * threads + thread + i) % users}"
+            store = storage.get_store(user)
+            store.fsync = fsync
+            store.append("add_expense", category="Load", amount=1, date="2024-01-01")
+
+    pool = [threading.Thread(target=write, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return threads * writes
+
+
+def run(processes=4, threads=4, writes=250, users=3, fsync=True, compact_every=None):
+    with tempfile.TemporaryDirectory() as data_dir:
+        if compact_every is not None:
+            storage.COMPACT_EVERY = compact_every
+        started = time.perf_counter()
+        jobs = [(data_dir, worker, threads, writes, users, fsync) for worker in range(processes)]
+        with Pool(processes) as pool:
+            written = sum(pool.map(_worker, jobs))
+        elapsed = time.perf_counter() - started
+
+        storage.DATA_DIR = data_dir
+        storage._stores.clear()
+        stored = sum(
+            len(storage.JournalStore(storage.user_data_path(f"user-{u}")).load()["logs"])
+            for u in range(users)
+        )
+    return {
+        "written": written,
+        "stored": stored,
+        "lost": written - stored,
+        "elapsed": elapsed,
+        "writes_per_sec": written / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=250, help="writes per thread")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--no-fsync", action="store_true")
+    parser.add_argument("--compact-every", type=int, default=None)
+    args = parser.parse_args()
+    result = run(args.processes, args.threads, args.writes, args.users, not args.no_fsync, args.compact_every)
+    print(
+        f"{result['written']} writes, {result['stored']} stored, {result['lost']} lost, "
+        f"{result['elapsed']:.2f}s ({result['writes_per_sec']:.0f} writes/s)"
+    )
+    raise SystemExit(1 if result["lost"] else 0)
@@ -0,0 +1,205 @@
+# metrics.py
+#
+# Lightweight in-process timing and counters for the chatbot pipeline,
+# exported in Prometheus text format.
+#
+# Instrumentation is off unless FINANCE_METRICS=1 is set; while off, span()
+# hands back a shared no-op context manager and inc()/observe() return after
+# one flag check, so instrumented code pays well under a microsecond per call.
+# When on, metrics can be scraped from a local HTTP endpoint
+# (FINANCE_METRICS_PORT) and/or written to a text file for node_exporter's
+# textfile collector (FINANCE_METRICS_FILE).
+#
+#   with metrics.span("finance_stage_seconds", stage="load_data"):
+#       data = load_data()
+#   metrics.inc("finance_llm_cache_requests_total", result="hit")
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.getenv("FINANCE_METRICS", "").lower() in ("1", "true", "yes")
+
+# Prometheus' default latency buckets, extended for slow LLM round-trips
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "finance_stage_seconds": "Time spent in a pipeline stage.",
+    "finance_interaction_seconds": "End-to-end handling time of one chat message, by intent.",
+    "finance_llm_request_seconds": "Groq round-trip time, including retries.",
+    "finance_llm_tokens_total": "Tokens reported by the Groq API.",
+    "finance_llm_cache_requests_total": "LLM response cache lookups.",
+    "finance_llm_errors_total": "Groq calls that failed after retries.",
+    "finance_intents_total": "Chat messages routed, by intent.",
+}
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_server = None
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(BUCKETS, value)] += 1
+        hist[-1] += value
+
+
+@contextmanager
+def _timed(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def span(name, **labels):
+    """Context manager observing its wall time into histogram `name`."""
+    if not ENABLED:
+        return _NOOP
+    return _timed(name, labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# -------------------- Export --------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(hist)) for key, hist in _histograms.items())
+
+    lines = []
+    typed = set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), hist in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), hist[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """One row per metric for the debug panel; histogram percentiles are bucket upper bounds."""
+    with _lock:
+        histograms = {key: list(hist) for key, hist in _histograms.items()}
+        counters = dict(_counters)
+    rows = []
+    for (name, labels), hist in sorted(histograms.items()):
+        count = sum(hist[:-1])
+        row = {"metric": name, "labels": dict(labels), "count": count, "mean_s": hist[-1] / count if count else 0}
+        for q in (50, 90, 99):
+            # Upper bound of the bucket holding the q-th percentile
+            target, seen = count * q / 100, 0
+            for bound, n in zip(BUCKETS + (float("inf"),), hist[:-1]):
+                seen += n
+                if seen >= target:
+                    row[f"p{q}_le_s"] = bound
+                    break
+        rows.append(row)
+    for (name, labels), value in sorted(counters.items()):
+        rows.append({"metric": name, "labels": dict(labels), "count": value})
+    return rows
+
+
+def write_textfile(path):
+    # Atomic rename so a scraper never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; later calls reuse the first server."""
+    # http.server is only needed when an endpoint is asked for
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def start_exporters():
+    """Start whatever exporters the environment asks for; safe to call on every rerun."""
+    if not ENABLED:
+        return
+    port = os.getenv("FINANCE_METRICS_PORT")
+    if port:
+        serve(int(port))
+    path = os.getenv("FINANCE_METRICS_FILE")
+    if path:
+        write_textfile(path)
@@ -0,0 +1,168 @@
+# online_stats.py
+#
+# Streaming per-category statistics extended as logs are appended, and kept
+# (like aggregates.ensure_rollups) next to a store's log ledger in memory, or
+# in data["stats"] for a plain dict of logs:
+#   {"rows": <logs covered>,
+#    "categories": {cat: {"n", "mean", "m2",     # Welford mean / variance
+#                         "ewma",                # exponentially weighted mean
+#                         "days",                # ring of [day, count] buckets
+#                         "amounts"}}}           # amount -> [last day, repeats]
+# Every update is O(1), so a new expense can be checked against its
+# category's history (spike? recurring charge?) without touching old logs.
+
+from datetime import date
+
+EWMA_ALPHA = 0.1
+WINDOW_DAYS = 30
+MIN_SAMPLES = 10
+Z_THRESHOLD = 3.0
+MAX_TRACKED_AMOUNTS = 64
+
+# Gap in days between equal charges that makes them look recurring
+RECURRING_PERIODS = {"weekly": (6, 8), "monthly": (26, 35)}
+
+
+def _day(iso_date):
+    return date.fromisoformat(str(iso_date)[:10]).toordinal()
+
+
+def _amount_key(amount):
+    return f"{float(amount):.2f}"
+
+
+def _empty_category():
+    return {
+        "n": 0,
+        "mean": 0.0,
+        "m2": 0.0,
+        "ewma": None,
+        "days": [[0, 0] for _ in range(WINDOW_DAYS)],
+        "amounts": {},
+    }
+
+
+def _period(gap):
+    for name, (lo, hi) in RECURRING_PERIODS.items():
+        if lo <= gap <= hi:
+            return name
+    return None
+
+
+def update_stats(stats, category, amount, iso_date):
+    cat = stats["categories"].setdefault(category, _empty_category())
+    amount = float(amount)
+    day = _day(iso_date)
+
+    # Welford
+    cat["n"] += 1
+    delta = amount - cat["mean"]
+    cat["mean"] += delta / cat["n"]
+    cat["m2"] += delta * (amount - cat["mean"])
+
+    cat["ewma"] = amount if cat["ewma"] is None else cat["ewma"] + EWMA_ALPHA * (amount - cat["ewma"])
+
+    # Daily counts in a ring indexed by day; a slot holding an older day is reused
+    slot = cat["days"][day % WINDOW_DAYS]
+    if slot[0] == day:
+        slot[1] += 1
+    elif slot[0] < day:
+        slot[0], slot[1] = day, 1
+
+    # Same amount seen before: count it as a repeat if the gap is regular
+    key = _amount_key(amount)
+    seen = cat["amounts"].pop(key, None)
+    if seen is None:
+        seen = [day, 0]
+    elif day > seen[0]:
+        seen = [day, seen[1] + 1 if _period(day - seen[0]) else 0]
+    cat["amounts"][key] = seen
+    if len(cat["amounts"]) > MAX_TRACKED_AMOUNTS:
+        # Dicts keep insertion order and hits are re-inserted: drop the stalest
+        del cat["amounts"][next(iter(cat["amounts"]))]
+    return cat
+
+
+def _empty_stats():
+    return {"rows": 0, "categories": {}}
+
+
+def _copy_category(cat):
+    return {
+        **cat,
+        "days": [list(slot) for slot in cat["days"]],
+        "amounts": {key: list(seen) for key, seen in cat["amounts"].items()},
+    }
+
+
+def extend_stats(previous, rows):
+    """New stats: `previous` (None for empty; left unmodified) plus log `rows`."""
+    if previous is None:
+        stats = _empty_stats()
+    else:
+        stats = {"rows": previous["rows"], "categories": dict(previous["categories"])}
+    copied = set()
+    for log in rows:
+        category = log["category"]
+        if category not in copied and category in stats["categories"]:
+            stats["categories"][category] = _copy_category(stats["categories"][category])
+        copied.add(category)
+        update_stats(stats, category, log["amount"], log["date"])
+        stats["rows"] += 1
+    return stats
+
+
+def ensure_stats(data):
+    """Return the stats for data["logs"], extended with any log rows they haven't seen."""
+    logs = data.setdefault("logs", [])
+    if hasattr(logs, "derived"):
+        return logs.derived("stats", extend_stats)
+    stats = data.get("stats")
+    if stats is None or stats["rows"] > len(logs):
+        stats = data["stats"] = _empty_stats()
+    for log in logs[stats["rows"]:]:
+        update_stats(stats, log["category"], log["amount"], log["date"])
+    stats["rows"] = len(logs)
+    return stats
+
+
+def variance(cat):
+    return cat["m2"] / cat["n"] if cat["n"] else 0.0
+
+
+def recent_count(cat, iso_date, days=WINDOW_DAYS):
+    """Entries in the `days` days up to and including `iso_date` (days <= WINDOW_DAYS)."""
+    end = _day(iso_date)
+    return sum(count for day, count in cat["days"] if end - days < day <= end)
+
+
+def assess_expense(data, category, amount, iso_date=None):
+    """How a not-yet-recorded expense compares with its category's history.
+
+    Returns {"n", "mean", "std", "z", "ewma", "outlier", "recurring",
+    "repeats", "recent_7d", "recent_30d"}; "recurring" is "weekly"/"monthly"
+    when the same amount last appeared one such period ago (else None), and
+    "repeats" counts the regular repeats before this one.
+    """
+    iso_date = iso_date or date.today().isoformat()
+    cat = ensure_stats(data)["categories"].get(category)
+    if cat is None:
+        return {"n": 0, "mean": None, "std": None, "z": None, "ewma": None, "outlier": False,
+                "recurring": None, "repeats": 0, "recent_7d": 0, "recent_30d": 0}
+    amount = float(amount)
+    std = variance(cat) ** 0.5
+    z = (amount - cat["mean"]) / std if std else None
+    seen = cat["amounts"].get(_amount_key(amount))
+    recurring = _period(_day(iso_date) - seen[0]) if seen else None
+    return {
+        "n": cat["n"],
+        "mean": cat["mean"],
+        "std": std,
+        "z": z,
+        "ewma": cat["ewma"],
+        "outlier": cat["n"] >= MIN_SAMPLES and z is not None and abs(z) >= Z_THRESHOLD,
+        "recurring": recurring,
+        "repeats": seen[1] if recurring else 0,
+        "recent_7d": recent_count(cat, iso_date, 7),
+        "recent_30d": recent_count(cat, iso_date),
+    }
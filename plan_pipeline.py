@@ -0,0 +1,55 @@
+# plan_pipeline.py
+#
+# Runs the "Comprehensive Financial Plan" sections concurrently. Rule-based
+# sections and LLM prompts (the full plan plus one per focus area) are
+# submitted to a thread pool bounded by `max_workers`, and results are
+# yielded as each one finishes, so the UI can render them incrementally and
+# total latency is bounded by the slowest section rather than their sum.
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from family_advisor import (
+    suggest_family_budget_plan,
+    suggest_child_education_plan,
+    suggest_emergency_fund_plan,
+    suggest_spouse_retirement_plan,
+    build_llm_prompt,
+    build_section_prompt,
+    SECTION_TOPICS,
+)
+from llm_groq import call_groq_llm
+
+MAX_WORKERS = 4
+
+RULE_SECTIONS = {
+    "📊 Budget Advice": suggest_family_budget_plan,
+    "🎓 Child Education": suggest_child_education_plan,
+    "💼 Emergency Fund": suggest_emergency_fund_plan,
+    "👵 Spouse Retirement": suggest_spouse_retirement_plan,
+}
+
+FULL_PLAN = "🤖 Full Plan"
+AI_SECTIONS = [FULL_PLAN] + [f"🤖 {section.capitalize()}" for section in SECTION_TOPICS]
+
+
+def plan_tasks(data, llm=call_groq_llm, refresh=False):
+    """Map of section name -> zero-argument callable producing its result."""
+    tasks = {name: (lambda fn=fn: fn(data)) for name, fn in RULE_SECTIONS.items()}
+    tasks[FULL_PLAN] = lambda: llm(build_llm_prompt(data), refresh=refresh)
+    for section in SECTION_TOPICS:
+        prompt = build_section_prompt(data, section)
+        tasks[f"🤖 {section.capitalize()}"] = lambda prompt=prompt: llm(prompt, refresh=refresh)
+    return tasks
+
+
+def run_plan(data, max_workers=MAX_WORKERS, llm=call_groq_llm, refresh=False):
+    """Yield (section name, result) pairs in completion order."""
+    tasks = plan_tasks(data, llm=llm, refresh=refresh)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(task): name for name, task in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                yield name, future.result()
+            except Exception as e:
+                yield name, f"❌ Error: {str(e)}"
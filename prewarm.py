@@ -0,0 +1,39 @@
+# prewarm.py
+#
+# Heavy dependencies (pandas, NumPy, matplotlib, requests, dotenv) are
+# imported by the features that need them rather than at app start. To keep
+# the first chart or Groq call from paying that cost, prewarm() imports them
+# in a daemon thread once the first page has rendered. Set
+# FINANCE_PREWARM=0 to turn it off.
+
+import importlib
+import os
+import threading
+
+PREWARM_MODULES = ("numpy", "pandas", "matplotlib.figure", "requests", "dotenv")
+
+_started = False
+_lock = threading.Lock()
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # The feature that needs it will report the missing dependency
+            pass
+
+
+def prewarm(modules=PREWARM_MODULES):
+    """Import `modules` in the background, once per process; returns the thread or None."""
+    global _started
+    if os.getenv("FINANCE_PREWARM", "1") == "0":
+        return None
+    with _lock:
+        if _started:
+            return None
+        _started = True
+    thread = threading.Thread(target=_import_all, args=(modules,), name="module-prewarm", daemon=True)
+    thread.start()
+    return thread
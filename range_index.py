@@ -0,0 +1,182 @@
+# range_index.py
+#
+# Per-category range-sum index over dates, backed by Fenwick (binary indexed)
+# trees. Each category keeps one tree of amounts and one of entry counts,
+# indexed by day offset from the first logged date, so
+#   "sum of category X between d1 and d2"
+# and appending a new expense are both O(log n) instead of a full DataFrame
+# scan. A pseudo-category ALL tracks every expense for whole-ledger queries.
+
+import calendar
+from datetime import date, timedelta
+
+ALL = "__all__"
+
+
+class FenwickTree:
+    def __init__(self):
+        # 1-based; tree[0] is unused
+        self.tree = [0]
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def prefix_sum(self, i):
+        """Sum of positions 1..i."""
+        i = min(i, len(self))
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, lo, hi):
+        """Sum of positions lo..hi (1-based, inclusive)."""
+        if hi < lo:
+            return 0
+        return self.prefix_sum(hi) - self.prefix_sum(lo - 1)
+
+    def _grow(self, size):
+        # Node i covers (i - lowbit(i), i]; with zeros in the new slots its
+        # value is the sum of the already-present positions in that span.
+        while len(self) < size:
+            i = len(self) + 1
+            self.tree.append(self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i)))
+
+    def add(self, i, value):
+        if i > len(self):
+            self._grow(i)
+        while i <= len(self):
+            self.tree[i] += value
+            i += i & -i
+
+
+def _to_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def months_before(d, months):
+    # Same clamping as pandas.DateOffset(months=...)
+    month_index = d.year * 12 + (d.month - 1) - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+class DateRangeIndex:
+    def __init__(self):
+        self.base = None
+        self.max_date = None
+        self.amounts = {}
+        self.counts = {}
+        self.n = 0
+
+    @classmethod
+    def from_logs(cls, logs):
+        index = cls()
+        for log in sorted(logs, key=lambda log: log["date"]):
+            index.add(log["category"], log["amount"], log["date"])
+        return index
+
+    def _position(self, d):
+        return (d - self.base).days + 1
+
+    def _rebase(self, new_base):
+        # Backdated entry before the first known day: shift every tree.
+        shift = (self.base - new_base).days
+        old_amounts, old_counts = self.amounts, self.counts
+        self.amounts, self.counts, self.base = {}, {}, new_base
+        for key, tree in old_amounts.items():
+            self.amounts[key] = FenwickTree()
+            self.counts[key] = FenwickTree()
+            for pos in range(1, len(tree) + 1):
+                value = tree.range_sum(pos, pos)
+                count = old_counts[key].range_sum(pos, pos)
+                if count:
+                    self.amounts[key].add(pos + shift, value)
+                    self.counts[key].add(pos + shift, count)
+
+    def add(self, category, amount, when):
+        """Record one expense; O(log n) for in-order or same-day appends."""
+        d = _to_date(when)
+        if self.base is None:
+            self.base = d
+        elif d < self.base:
+            self._rebase(d)
+        if self.max_date is None or d > self.max_date:
+            self.max_date = d
+        pos = self._position(d)
+        for key in (category, ALL):
+            self.amounts.setdefault(key, FenwickTree()).add(pos, amount)
+            self.counts.setdefault(key, FenwickTree()).add(pos, 1)
+        self.n += 1
+
+    @property
+    def categories(self):
+        return [key for key in self.amounts if key != ALL]
+
+    def _range(self, trees, category, start, end):
+        tree = trees.get(category)
+        if tree is None or self.base is None:
+            return 0
+        lo = max(self._position(_to_date(start)), 1)
+        hi = self._position(_to_date(end))
+        return tree.range_sum(lo, hi)
+
+    def range_sum(self, category, start, end):
+        """Sum of `category` (or ALL) between `start` and `end`, inclusive."""
+        return self._range(self.amounts, category, start, end)
+
+    def range_count(self, category, start, end):
+        return self._range(self.counts, category, start, end)
+
+    # -------------------- time_analyzer queries --------------------
+
+    def expense_last_n_days(self, category, days):
+        if self.max_date is None:
+            return 0
+        return self.range_sum(category, self.max_date - timedelta(days=days), self.max_date)
+
+    def _months(self, start):
+        # (label, first day, last day) for every calendar month from start to max_date
+        year, month = start.year, start.month
+        while (year, month) <= (self.max_date.year, self.max_date.month):
+            last = calendar.monthrange(year, month)[1]
+            yield f"{year:04d}-{month:02d}", max(date(year, month, 1), start), date(year, month, last)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def monthly_expense_summary(self, category=ALL):
+        if self.base is None:
+            return {}
+        summary = {}
+        for label, first, last in self._months(self.base):
+            if self.range_count(category, first, last):
+                summary[label] = self.range_sum(category, first, last)
+        return summary
+
+    def average_monthly_expense(self, start=None):
+        """Mean of monthly totals per category, over months with any entries."""
+        if self.base is None:
+            return {}
+        start = self.base if start is None else max(_to_date(start), self.base)
+        averages = {}
+        for category in self.categories:
+            totals = [
+                self.range_sum(category, first, last)
+                for _, first, last in self._months(start)
+                if self.range_count(category, first, last)
+            ]
+            if totals:
+                averages[category] = sum(totals) / len(totals)
+        return averages
+
+    def highest_avg_spending_category(self, months):
+        if self.max_date is None:
+            return "No data available."
+        avg = self.average_monthly_expense(months_before(self.max_date, months))
+        if not avg:
+            return "No data available."
+        max_cat = max(avg, key=avg.get)
+        return f"📈 Highest average spending category in last {months} months: {max_cat} (₹{avg[max_cat]:.2f})"
@@ -0,0 +1,118 @@
+# savings_simulation.py
+#
+# Monte Carlo projection of savings towards a goal. Unlike the straight-line
+# savings_goal_plan / project_future_savings, each simulated path draws
+# monthly investment returns, inflation, income and expenses at random, and
+# the results are reported as a probability of reaching the goal plus
+# percentile bands over time.
+#
+# Paths are simulated as NumPy arrays (one row per path) in fixed-size
+# shards; each shard gets its own child of one SeedSequence, so a seeded run
+# is reproducible however many worker processes share the shards.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aggregates import monthly_totals, total_expense
+
+SHARD_PATHS = 100_000
+MAX_CHECKPOINTS = 24
+PERCENTILES = (5, 25, 50, 75, 95)
+
+DEFAULT_ASSUMPTIONS = {
+    "annual_return": 0.08,
+    "return_volatility": 0.15,
+    "inflation": 0.05,
+    "inflation_volatility": 0.01,
+    "income_volatility": 0.05,
+    "expense_volatility": 0.10,
+}
+
+
+def assumptions_from_data(data):
+    """Starting point for a simulation from finance_data.json contents."""
+    income = data.get("income", 0) + data.get("family_profile", {}).get("spouse_income", 0)
+    assumptions = {
+        "starting_savings": data.get("savings", 0),
+        "monthly_income": income,
+        "monthly_expense": total_expense(data),
+        "expense_volatility": DEFAULT_ASSUMPTIONS["expense_volatility"],
+    }
+    # With at least two months of dated logs, use their mean and spread instead
+    monthly = list(monthly_totals(data).values())
+    if len(monthly) >= 2:
+        mean = float(np.mean(monthly))
+        assumptions["monthly_expense"] = mean
+        if mean > 0:
+            assumptions["expense_volatility"] = float(np.std(monthly, ddof=1) / mean)
+    return assumptions
+
+
+def _checkpoints(months):
+    # Months at which balances are recorded for the percentile bands
+    count = min(months, MAX_CHECKPOINTS)
+    return np.unique(np.linspace(1, months, count).round().astype(np.int64))
+
+
+def _simulate_shard(args):
+    seed, paths, months, starting_savings, monthly_income, monthly_expense, params, checkpoints = args
+    rng = np.random.default_rng(seed)
+    mu = params["annual_return"] / 12
+    sigma = params["return_volatility"] / np.sqrt(12)
+    infl_mu = params["inflation"] / 12
+    infl_sigma = params["inflation_volatility"] / np.sqrt(12)
+
+    balance = np.full(paths, float(starting_savings))
+    price_level = np.ones(paths)
+    recorded = np.empty((paths, len(checkpoints)), dtype=np.float32)
+    slot = 0
+    for month in range(1, months + 1):
+        price_level *= 1 + rng.normal(infl_mu, infl_sigma, paths)
+        income = monthly_income * price_level * (1 + rng.normal(0, params["income_volatility"], paths))
+        expense = monthly_expense * price_level * np.maximum(1 + rng.normal(0, params["expense_volatility"], paths), 0)
+        balance = balance * (1 + rng.normal(mu, sigma, paths)) + income - expense
+        if slot < len(checkpoints) and checkpoints[slot] == month:
+            # Balances are reported in today's rupees
+            recorded[:, slot] = balance / price_level
+            slot += 1
+    return recorded
+
+
+def simulate_savings(goal, months, starting_savings, monthly_income, monthly_expense,
+                     paths=10_000, seed=None, workers=None, shard_paths=SHARD_PATHS,
+                     percentiles=PERCENTILES, **assumptions):
+    """
+    Simulate `paths` savings trajectories over `months` months.
+
+    `goal` is in today's rupees. Keyword overrides for DEFAULT_ASSUMPTIONS
+    (annual_return, return_volatility, inflation, ...) are accepted.
+    With more than one shard and workers != 1, shards run in a process pool.
+
+    Returns {"probability", "checkpoints", "bands": {pct: array}, "final": {pct: value}}.
+    """
+    params = dict(DEFAULT_ASSUMPTIONS, **assumptions)
+    months = int(months)
+    checkpoints = _checkpoints(months)
+    shard_sizes = [min(shard_paths, paths - start) for start in range(0, paths, shard_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    jobs = [
+        (shard_seed, size, months, starting_savings, monthly_income, monthly_expense, params, checkpoints)
+        for shard_seed, size in zip(seeds, shard_sizes)
+    ]
+
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_shard, jobs))
+    else:
+        parts = [_simulate_shard(job) for job in jobs]
+    balances = np.concatenate(parts)
+
+    bands = np.percentile(balances, percentiles, axis=0)
+    final = balances[:, -1]
+    return {
+        "probability": float(np.mean(final >= goal)),
+        "checkpoints": checkpoints,
+        "bands": {pct: band for pct, band in zip(percentiles, bands)},
+        "final": {pct: float(band[-1]) for pct, band in zip(percentiles, bands)},
+    }
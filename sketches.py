@@ -0,0 +1,263 @@
+# sketches.py
+#
+# Bounded-memory summaries for "largest N" and percentile queries, kept per
+# category and per month and extended as logs are appended. Like
+# aggregates.ensure_rollups, they live in memory next to a store's log
+# ledger, or in data["sketches"] for a plain dict of logs:
+#   {"rows": <logs covered>,
+#    "month": {cat: {"2024-04": {"top": [[amount, date], ...],   # min-heap
+#                                "kll": {...}}}}}                # quantile sketch
+#
+# "top" keeps the TOP_K largest expenses of that category-month, so the
+# largest N (N <= TOP_K) over any set of whole months is an exact merge of
+# the per-month heaps.
+#
+# "kll" is a KLL quantile sketch (Karnin, Lang & Liberty 2016) of the
+# amounts. It holds at most ~3*k values however many expenses it has seen,
+# and sketches of different months/categories merge into a sketch of their
+# union. With the default k=200 a quantile query is off by at most about
+# 1.3% in rank (the returned value sits between the true q-0.013 and
+# q+0.013 quantiles) with 99% confidence; below ~k values per bucket it is
+# exact.
+
+import calendar
+import heapq
+import math
+import random
+from datetime import date
+
+from aggregates import ensure_rollups
+
+TOP_K = 20
+KLL_K = 200
+KLL_C = 2 / 3
+
+_rng = random.Random()
+
+
+# -------------------- KLL sketch --------------------
+
+def kll_new(k=KLL_K):
+    return {"k": k, "n": 0, "levels": [[]]}
+
+
+def _capacity(sketch, level):
+    depth = len(sketch["levels"]) - level - 1
+    return int(math.ceil(sketch["k"] * KLL_C ** depth)) + 1
+
+
+def _max_size(sketch):
+    return sum(_capacity(sketch, level) for level in range(len(sketch["levels"])))
+
+
+def _compress(sketch):
+    levels = sketch["levels"]
+    size = sum(len(items) for items in levels)
+    for level in range(len(levels)):
+        if len(levels[level]) >= _capacity(sketch, level):
+            if level + 1 == len(levels):
+                levels.append([])
+            # Sort, then promote every other item (random phase) one level
+            # up with double weight; an odd leftover stays behind.
+            items = sorted(levels[level])
+            keep = len(items) % 2
+            promoted = items[keep + _rng.getrandbits(1)::2]
+            levels[level + 1].extend(promoted)
+            levels[level] = items[:keep]
+            size -= len(items) - keep - len(promoted)
+            if size < _max_size(sketch):
+                break
+
+
+def kll_update(sketch, value):
+    sketch["levels"][0].append(value)
+    sketch["n"] += 1
+    if sum(len(items) for items in sketch["levels"]) >= _max_size(sketch):
+        _compress(sketch)
+    return sketch
+
+
+def kll_merge(*sketches):
+    """A new sketch summarizing the union of the inputs' streams."""
+    merged = kll_new(min(s["k"] for s in sketches) if sketches else KLL_K)
+    height = max((len(s["levels"]) for s in sketches), default=1)
+    merged["levels"] = [[] for _ in range(height)]
+    for sketch in sketches:
+        merged["n"] += sketch["n"]
+        for level, items in enumerate(sketch["levels"]):
+            merged["levels"][level].extend(items)
+    while sum(len(items) for items in merged["levels"]) >= _max_size(merged):
+        _compress(merged)
+    return merged
+
+
+def kll_quantiles(sketch, qs):
+    """Approximate value at each quantile in `qs` (0..1); None if empty."""
+    weighted = sorted(
+        (value, 1 << level) for level, items in enumerate(sketch["levels"]) for value in items
+    )
+    total = sum(weight for _, weight in weighted)
+    results = []
+    for q in qs:
+        if not weighted:
+            results.append(None)
+            continue
+        target, seen = q * total, 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                break
+        results.append(value)
+    return results
+
+
+def kll_quantile(sketch, q):
+    return kll_quantiles(sketch, [q])[0]
+
+
+# -------------------- Top-k heaps --------------------
+
+def topk_push(heap, item, k=TOP_K):
+    """Keep the k largest items of a min-heap list in place."""
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+    return heap
+
+
+def topk_merge(heaps, k=TOP_K):
+    return heapq.nlargest(k, (item for heap in heaps for item in heap))
+
+
+# -------------------- Per-category, per-month buckets --------------------
+
+def _empty_sketches():
+    return {"rows": 0, "month": {}}
+
+
+def update_sketches(sketches, category, amount, iso_date):
+    iso_date = str(iso_date)[:10]
+    bucket = sketches["month"].setdefault(category, {}).setdefault(
+        iso_date[:7], {"top": [], "kll": kll_new()}
+    )
+    amount = float(amount)
+    topk_push(bucket["top"], [amount, iso_date])
+    kll_update(bucket["kll"], amount)
+
+
+def _copy_bucket(bucket):
+    kll = bucket["kll"]
+    return {"top": list(bucket["top"]), "kll": {**kll, "levels": [list(items) for items in kll["levels"]]}}
+
+
+def extend_sketches(previous, rows):
+    """New sketches: `previous` (None for empty; left unmodified) plus log `rows`."""
+    if previous is None:
+        sketches = _empty_sketches()
+    else:
+        sketches = {"rows": previous["rows"], "month": dict(previous["month"])}
+    copied = set()
+    for log in rows:
+        category, month = log["category"], str(log["date"])[:7]
+        months = sketches["month"].get(category)
+        if category not in copied:
+            # Copy a category's month map, then each month bucket, before touching it
+            months = sketches["month"][category] = dict(months or {})
+            copied.add(category)
+        if (category, month) not in copied and month in months:
+            months[month] = _copy_bucket(months[month])
+        copied.add((category, month))
+        update_sketches(sketches, category, log["amount"], log["date"])
+        sketches["rows"] += 1
+    return sketches
+
+
+def ensure_sketches(data):
+    """Return the sketches for data["logs"], extended with any log rows they haven't seen."""
+    logs = data.setdefault("logs", [])
+    if hasattr(logs, "derived"):
+        return logs.derived("sketches", extend_sketches)
+    sketches = data.get("sketches")
+    if sketches is None or sketches["rows"] > len(logs):
+        sketches = data["sketches"] = _empty_sketches()
+    for log in logs[sketches["rows"]:]:
+        update_sketches(sketches, log["category"], log["amount"], log["date"])
+    sketches["rows"] = len(logs)
+    return sketches
+
+
+def _buckets(data, category=None, start=None, end=None):
+    # (category, bucket) for every month overlapping [start, end]
+    start_month = str(start)[:7] if start else None
+    end_month = str(end)[:7] if end else None
+    for cat, months in ensure_sketches(data)["month"].items():
+        if category is not None and cat != category:
+            continue
+        for month, bucket in months.items():
+            if (start_month is None or month >= start_month) and (end_month is None or month <= end_month):
+                yield cat, bucket
+
+
+def quarter_range(when=None):
+    """(first day, last day) ISO dates of the calendar quarter containing `when`."""
+    d = date.fromisoformat(str(when)[:10]) if when else date.today()
+    first_month = 3 * ((d.month - 1) // 3) + 1
+    last_month = first_month + 2
+    return (
+        date(d.year, first_month, 1).isoformat(),
+        date(d.year, last_month, calendar.monthrange(d.year, last_month)[1]).isoformat(),
+    )
+
+
+def top_expenses(data, n=10, category=None, start=None, end=None):
+    """The n largest expenses (n <= TOP_K) between `start` and `end`, as log dicts.
+
+    Exact when the range covers whole months. In a partial first or last
+    month, only that month's TOP_K largest are candidates, so an expense
+    smaller than those that falls inside the range may be left out.
+    """
+    start = str(start)[:10] if start else None
+    end = str(end)[:10] if end else None
+    candidates = (
+        (amount, day, cat)
+        for cat, bucket in _buckets(data, category, start, end)
+        for amount, day in bucket["top"]
+        if (start is None or day >= start) and (end is None or day <= end)
+    )
+    return [
+        {"date": day, "category": cat, "amount": amount}
+        for amount, day, cat in heapq.nlargest(n, candidates)
+    ]
+
+
+def amount_quantiles(data, qs=(0.5, 0.9, 0.99), category=None, start=None, end=None):
+    """{q: amount} per-expense quantiles over the months overlapping [start, end]."""
+    merged = kll_merge(*(bucket["kll"] for _, bucket in _buckets(data, category, start, end)))
+    return dict(zip(qs, kll_quantiles(merged, qs)))
+
+
+def category_quantiles(data, qs=(0.5, 0.9, 0.99), start=None, end=None):
+    """{category: {q: amount}} for every category with expenses in range."""
+    result = {}
+    for cat in ensure_sketches(data)["month"]:
+        quantiles = amount_quantiles(data, qs, cat, start, end)
+        if quantiles[qs[0]] is not None:
+            result[cat] = quantiles
+    return result
+
+
+def daily_spend_quantile(data, category, q=0.5, start=None, end=None):
+    """Exact q-quantile of a category's daily totals, over days with spending.
+
+    Read from the day rollups, so it costs O(days) regardless of how many
+    expenses each day holds.
+    """
+    days = ensure_rollups(data)["day"].get(category, {})
+    totals = sorted(
+        total for day, total in days.items()
+        if (start is None or day >= str(start)[:10]) and (end is None or day <= str(end)[:10])
+    )
+    if not totals:
+        return None
+    return totals[min(int(math.ceil(q * len(totals))) - 1, len(totals) - 1) if q > 0 else 0]
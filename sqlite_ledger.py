@@ -0,0 +1,213 @@
+# sqlite_ledger.py
+#
+# Optional SQLite-backed ledger. Mirrors the JSON-based operations in
+# dsa_algos and time_analyzer, but runs them as indexed SQL so totals and
+# date-window sums don't need the whole history in memory.
+#
+# Rows carry a `source` column because the three JSON stores overlap:
+# finance_data.json keeps undated per-category lists *and* dated logs, while
+# data.json and expenses.json each hold one flat list. Every expense the app
+# records lands in both finance_data.json copies, so each query reads only
+# one of them by default: totals come from the lists (as dsa_algos does) and
+# date-window queries from the logs (as time_analyzer does), each together
+# with rows added directly through add_expense. Pass `source` to read other
+# sources, or source=None for every row.
+#
+# Amounts are stored as integer paise and converted on read, so totals are
+# exact and match ledger.Ledger's for the same data. Importing a JSON store
+# replaces the rows of its source, so running the migration again does not
+# count anything twice.
+
+import json
+import os
+import sqlite3
+from datetime import date, timedelta
+
+from ledger import MINOR_UNITS, to_paise, to_rupees
+from range_index import months_before
+
+DB_FILE = "finance_ledger.db"
+
+APP_SOURCE = "app"
+TOTALS_SOURCES = (APP_SOURCE, "finance_data.expenses")
+DATED_SOURCES = (APP_SOURCE, "finance_data.logs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id       INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    paise    INTEGER NOT NULL,
+    date     TEXT,
+    source   TEXT NOT NULL DEFAULT 'app'
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_category_date ON expenses (category, date);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date);
+"""
+
+
+def _source_filter(source):
+    """(SQL condition, params) selecting rows from `source`: a name, a tuple of names, or None for all."""
+    if source is None:
+        return "1", ()
+    if isinstance(source, str):
+        source = (source,)
+    return f"source IN ({', '.join('?' * len(source))})", tuple(source)
+
+
+class SQLiteLedger:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+
+    def _migrate(self):
+        # Databases from before amounts were kept as paise have a REAL
+        # "amount" column; rebuild the table around integer paise.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(expenses)")}
+        if "amount" not in columns:
+            return
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("ALTER TABLE expenses RENAME TO expenses_real")
+            self.conn.execute("DROP INDEX IF EXISTS idx_expenses_category_date")
+            self.conn.execute("DROP INDEX IF EXISTS idx_expenses_date")
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+            self.conn.execute(
+                "INSERT INTO expenses (id, category, paise, date, source) "
+                "SELECT id, category, CAST(ROUND(amount * ?) AS INTEGER), date, source FROM expenses_real",
+                (MINOR_UNITS,),
+            )
+            self.conn.execute("DROP TABLE expenses_real")
+
+    def close(self):
+        self.conn.close()
+
+    # -------------------- Writes --------------------
+
+    def add_expense(self, category, amount, date=None, source=APP_SOURCE):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO expenses (category, paise, date, source) VALUES (?, ?, ?, ?)",
+                (category, to_paise(amount, exact=False), date, source),
+            )
+
+    def add_expenses(self, rows, source=APP_SOURCE, replace=False):
+        """Bulk insert of (category, amount, date) tuples in one transaction.
+
+        replace=True first deletes every row already from `source`, in the
+        same transaction.
+        """
+        with self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM expenses WHERE source = ?", (source,))
+            self.conn.executemany(
+                "INSERT INTO expenses (category, paise, date, source) VALUES (?, ?, ?, ?)",
+                ((category, to_paise(amount, exact=False), d, source) for category, amount, d in rows),
+            )
+
+    # -------------------- dsa_algos equivalents --------------------
+
+    def total_expenses_by_category(self, source=TOTALS_SOURCES):
+        where, params = _source_filter(source)
+        query = f"SELECT category, SUM(paise) FROM expenses WHERE {where} GROUP BY category"
+        return {category: to_rupees(total) for category, total in self.conn.execute(query, params)}
+
+    def range_sum(self, category, start, end, source=DATED_SOURCES):
+        """Sum of `category` between `start` and `end` (ISO dates, inclusive)."""
+        where, params = _source_filter(source)
+        row = self.conn.execute(
+            "SELECT COALESCE(SUM(paise), 0) FROM expenses "
+            f"WHERE category = ? AND date BETWEEN ? AND ? AND {where}",
+            (category, start, end, *params),
+        ).fetchone()
+        return to_rupees(row[0])
+
+    def monthly_expense_summary(self, source=DATED_SOURCES):
+        where, params = _source_filter(source)
+        rows = self.conn.execute(
+            "SELECT substr(date, 1, 7) AS month, SUM(paise) FROM expenses "
+            f"WHERE date IS NOT NULL AND {where} GROUP BY month ORDER BY month",
+            params,
+        ).fetchall()
+        return {month: to_rupees(total) for month, total in rows}
+
+    # -------------------- time_analyzer equivalents --------------------
+
+    def _max_date(self, source=DATED_SOURCES):
+        where, params = _source_filter(source)
+        row = self.conn.execute(f"SELECT MAX(date) FROM expenses WHERE {where}", params).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def expense_last_n_days(self, category, days, source=DATED_SOURCES):
+        recent_date = self._max_date(source)
+        if recent_date is None:
+            return 0
+        from_date = recent_date - timedelta(days=days)
+        return self.range_sum(category, from_date.isoformat(), recent_date.isoformat(), source)
+
+    def average_monthly_expense(self, from_date=None, source=DATED_SOURCES):
+        where, params = _source_filter(source)
+        if from_date is not None:
+            where += " AND date >= ?"
+            params += (from_date,)
+        query = (
+            "SELECT category, AVG(month_total) FROM ("
+            "  SELECT category, substr(date, 1, 7) AS month, SUM(paise) AS month_total"
+            f"  FROM expenses WHERE date IS NOT NULL AND {where}"
+            "  GROUP BY category, month"
+            ") GROUP BY category"
+        )
+        return {category: avg / MINOR_UNITS for category, avg in self.conn.execute(query, params)}
+
+    def highest_avg_spending_category(self, months, source=DATED_SOURCES):
+        recent_date = self._max_date(source)
+        if recent_date is None:
+            return "No data available."
+        from_date = months_before(recent_date, months)
+        avg = self.average_monthly_expense(from_date.isoformat(), source)
+        if not avg:
+            return "No data available."
+        max_cat = max(avg, key=avg.get)
+        return f"📈 Highest average spending category in last {months} months: {max_cat} (₹{avg[max_cat]:.2f})"
+
+    # -------------------- JSON importers --------------------
+
+    def import_finance_data(self, path="finance_data.json"):
+        """Import finance_data.json: undated category lists plus dated logs."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        undated = [
+            (category, amount, None)
+            for category, amounts in data.get("expenses", {}).items()
+            for amount in amounts
+        ]
+        dated = [
+            (log["category"], log["amount"], log.get("date"))
+            for log in data.get("logs", [])
+        ]
+        self.add_expenses(undated, source="finance_data.expenses", replace=True)
+        self.add_expenses(dated, source="finance_data.logs", replace=True)
+        return len(undated) + len(dated)
+
+    def import_log_list(self, path, source):
+        """Import a flat list of {category, amount[, date]} records (data.json, expenses.json)."""
+        with open(path, "r") as f:
+            records = json.load(f)
+        rows = [(r["category"], r["amount"], r.get("date")) for r in records]
+        self.add_expenses(rows, source=source, replace=True)
+        return len(rows)
+
+    def import_json_stores(self, finance_path="finance_data.json",
+                           logs_path="data.json", expenses_path="expenses.json"):
+        """Migrate all three JSON stores, replacing earlier imports. Returns rows imported per file."""
+        counts = {}
+        if os.path.exists(finance_path):
+            counts[finance_path] = self.import_finance_data(finance_path)
+        if os.path.exists(logs_path):
+            counts[logs_path] = self.import_log_list(logs_path, source="data.json")
+        if os.path.exists(expenses_path):
+            counts[expenses_path] = self.import_log_list(expenses_path, source="expenses.json")
+        return counts
@@ -0,0 +1,294 @@
+# statement_import.py
+#
+# Streaming importer for bank-statement exports (CSV or a JSON array of
+# objects). Records are read one at a time, normalized to the app's
+# {date, category, amount} log shape, de-duplicated against the existing
+# logs through a hash index, and committed to the journal store in chunks.
+# The store runs in bulk mode for the whole import (journal appends only,
+# one compaction at the end), and the dedup index remembers the file's own
+# rows for a sliding window of days, so memory is bounded by the chunk size
+# and window rather than the file size.
+
+import csv
+import hashlib
+import json
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, datetime
+from itertools import chain, islice
+
+import storage
+
+CHUNK_SIZE = 5000
+READ_SIZE = 64 * 1024
+
+# Days of the file's own rows kept for dedup, behind the latest date seen
+DEDUP_WINDOW_DAYS = 7
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y", "%d/%m/%y", "%Y/%m/%d"]
+
+# Accepted column names for each field, checked in order (case-insensitive)
+DATE_COLUMNS = ["date", "txn date", "transaction date", "value date", "posting date"]
+CATEGORY_COLUMNS = ["category", "type", "description", "narration", "remarks"]
+AMOUNT_COLUMNS = ["amount", "debit", "withdrawal", "withdrawal amt.", "debit amount"]
+# Signed column: sign says whether money went out or came in
+SIGNED_AMOUNT_COLUMN = "amount"
+# Debit/credit indicator columns and the values that mark a credit
+DIRECTION_COLUMNS = ["dr/cr", "cr/dr", "debit/credit", "txn type", "transaction type"]
+CREDIT_MARKERS = {"cr", "credit", "c", "deposit"}
+
+
+# -------------------- Readers --------------------
+
+def iter_csv(path):
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_json_array(path, read_size=READ_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    eof = False
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if buffer.startswith("["):
+                    buffer = buffer[1:]
+                    started = True
+                    continue
+            else:
+                if buffer.startswith(","):
+                    buffer = buffer[1:]
+                    continue
+                if buffer.startswith("]"):
+                    return
+                if buffer:
+                    try:
+                        value, end = decoder.raw_decode(buffer)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                    else:
+                        yield value
+                        buffer = buffer[end:]
+                        continue
+            if eof:
+                if started:
+                    raise ValueError(f"Unterminated JSON array in {path}")
+                raise ValueError(f"{path} is not a JSON array")
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer += chunk
+
+
+def iter_records(path):
+    if str(path).lower().endswith(".csv"):
+        return iter_csv(path)
+    return iter_json_array(path)
+
+
+# -------------------- Normalization --------------------
+
+def _lowered(record):
+    return {str(k).strip().lower(): v for k, v in record.items()}
+
+
+def _field(lowered, names):
+    """(column name, value) of the first non-empty column in `names`, else (None, None)."""
+    for name in names:
+        value = lowered.get(name)
+        if value not in (None, ""):
+            return name, value
+    return None, None
+
+
+def normalize_date(value):
+    value = str(value).strip()
+    # Try the whole value, then just the part before a time ("01/04/2024 10:15")
+    for candidate in (value, value.split(" ")[0]):
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt).date().isoformat()
+            except ValueError:
+                continue
+    # ISO timestamps such as 2024-04-01T10:15:00
+    return datetime.fromisoformat(value).date().isoformat()
+
+
+def normalize_amount(value):
+    """Signed amount rounded to the paisa; "(120.50)" is negative."""
+    if isinstance(value, (int, float)):
+        amount = float(value)
+    else:
+        text = str(value).replace("₹", "").replace(",", "").strip()
+        if text.lower().startswith("rs"):
+            text = text[2:].lstrip(". ")
+        negative = text.startswith("(") and text.endswith(")")
+        amount = float(text.strip("()"))
+        if negative:
+            amount = -amount
+    amount = round(amount, 2)
+    return int(amount) if amount == int(amount) else amount
+
+
+def normalize_category(value):
+    # Same casing as categories typed into the chatbot ("Food")
+    return str(value).strip().split()[0].capitalize() if str(value).strip() else "Others"
+
+
+def is_signed(records):
+    """Whether a sample of records uses a signed amount column (any negative value).
+
+    Statements with one signed column record spending as negative amounts
+    and credits as positive ones; the app's own log lists (data.json) hold
+    positive expense amounts.
+    """
+    for record in records:
+        value = _lowered(record).get(SIGNED_AMOUNT_COLUMN)
+        try:
+            if value not in (None, "") and normalize_amount(value) < 0:
+                return True
+        except (ValueError, TypeError):
+            continue
+    return False
+
+
+def normalize_record(record, signed=False):
+    """Return a {date, category, amount} log dict, or None if the row isn't an expense.
+
+    Credits are skipped: rows whose debit/credit column marks a credit and,
+    in the signed amount column, non-negative amounts when `signed`
+    (negative ones when not, i.e. refunds in a list of expenses). Debit and
+    withdrawal columns always hold money going out.
+    """
+    lowered = _lowered(record)
+    _, raw_date = _field(lowered, DATE_COLUMNS)
+    column, raw_amount = _field(lowered, AMOUNT_COLUMNS)
+    if raw_date is None or raw_amount is None:
+        return None
+    _, direction = _field(lowered, DIRECTION_COLUMNS)
+    amount = normalize_amount(raw_amount)
+    if direction is not None:
+        if str(direction).strip().lower() in CREDIT_MARKERS:
+            return None
+        amount = abs(amount)
+    elif column == SIGNED_AMOUNT_COLUMN:
+        if signed:
+            if amount >= 0:
+                return None
+            amount = -amount
+        elif amount < 0:
+            return None
+    else:
+        amount = abs(amount)
+    if amount == 0:
+        return None
+    return {
+        "date": normalize_date(raw_date),
+        "category": normalize_category(_field(lowered, CATEGORY_COLUMNS)[1] or "Others"),
+        "amount": amount,
+    }
+
+
+# -------------------- Dedup index --------------------
+
+def record_key(log):
+    # 8-byte digest keeps the index small however many logs exist
+    payload = f"{log['date']}|{log['category']}|{round(float(log['amount']) * 100)}"
+    return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class DedupIndex:
+    """Multiset of existing log keys, checked against a window of the file's rows.
+
+    Repeated identical rows (two equal purchases on one day) are legitimate,
+    so a row counts as a duplicate only while the file has shown no more
+    copies of it than the store already holds. Re-importing the same
+    statement is therefore a no-op.
+
+    The store's keys sit in one sorted array (8 bytes per existing log).
+    The file's rows are counted per day and forgotten once they fall
+    `window_days` behind the latest date seen, which suits date-ordered
+    statements; a row arriving later than that is checked against the store
+    alone.
+    """
+
+    def __init__(self, logs=(), window_days=DEDUP_WINDOW_DAYS):
+        self.existing = array("q", sorted(record_key(log) for log in logs))
+        self.window_days = window_days
+        self.seen = {}  # day ordinal -> Counter of keys
+        self.latest = None
+
+    def _existing_count(self, key):
+        return bisect_right(self.existing, key) - bisect_left(self.existing, key)
+
+    def is_duplicate(self, log):
+        key = record_key(log)
+        day = date.fromisoformat(log["date"]).toordinal()
+        if self.latest is None or day > self.latest:
+            self.latest = day
+            for old in [d for d in self.seen if d < day - self.window_days]:
+                del self.seen[old]
+        seen = self.seen.setdefault(day, Counter())
+        seen[key] += 1
+        return seen[key] <= self._existing_count(key)
+
+
+# -------------------- Pipeline --------------------
+
+def import_statement(path, store=None, chunk_size=CHUNK_SIZE, progress=None, signed=None):
+    """
+    Stream `path` into the journal store in chunks of `chunk_size` records.
+
+    `signed` says whether the "amount" column is signed (spending negative);
+    None detects it from the first chunk. `progress`, if given, is called
+    after every chunk with the running stats dict (rows read/imported/
+    duplicates/skipped, elapsed seconds, rows/sec). Returns the final stats.
+    """
+    store = store or storage._default_store
+    index = DedupIndex(store.load().get("logs", []))
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "skipped": 0, "elapsed": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+
+    records = iter_records(path)
+    first = list(islice(records, chunk_size))
+    if signed is None:
+        signed = is_signed(first)
+    records = chain(first, records)
+    del first
+
+    with store.bulk():
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            mutations = []
+            for record in chunk:
+                stats["read"] += 1
+                try:
+                    log = normalize_record(record, signed)
+                except (ValueError, TypeError):
+                    log = None
+                if log is None:
+                    stats["skipped"] += 1
+                elif index.is_duplicate(log):
+                    stats["duplicates"] += 1
+                else:
+                    mutations.append({"op": "add_expense", **log})
+            if mutations:
+                store.append_many(mutations)
+                stats["imported"] += len(mutations)
+
+            stats["elapsed"] = time.perf_counter() - started
+            stats["rows_per_sec"] = stats["read"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+
+    stats["elapsed"] = time.perf_counter() - started
+    stats["rows_per_sec"] = stats["read"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
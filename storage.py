@@ -0,0 +1,604 @@
+# storage.py
+#
+# Append-only journal store for finance_data.json.
+#
+# The JSON file is kept as a snapshot; every mutation (an added expense, an
+# income/savings update, a family profile change) is appended as one line to
+# a sibling ".journal" file. Loading replays the journal tail on top of the
+# snapshot, and once the journal grows past COMPACT_EVERY records it is folded
+# back into a fresh snapshot. A write therefore costs one short line no
+# matter how much history exists, and a crash mid-append can at worst lose the
+# half-written last line instead of truncating the whole file.
+#
+# Parsed state is cached in-process, keyed on the (mtime, size) of the
+# snapshot and journal, and shared by every Streamlit rerun and session. A
+# rerun with no writes in between costs two os.stat calls instead of a JSON
+# parse. Writes through the store apply their record to the cached state
+# under the store's lock, so load_data() never hands that state out: it
+# returns a snapshot (read-only ledger views plus copies of the small
+# fields) that later writes leave alone, memoized per version so sessions
+# share it. Snapshots must not be modified; change data through the
+# record_* functions and load again to see the result.
+#
+# In memory, the per-category "expenses" lists and the "logs" are held as
+# compact ledger.Ledger columns (see to_memory); snapshots are written back
+# in the plain JSON schema.
+#
+# Writers take an exclusive file lock per store, so concurrent processes
+# never interleave appends or lose each other's records; readers take no
+# lock and simply re-read if the files changed while they were reading.
+# When another process has only appended to the journal, the cached state is
+# brought up to date by reading just the new bytes, not by a full reparse.
+#
+# Each compaction also extends a columnar_logs mirror of the logs
+# (<path>.logs.*) with the rows logged since the last one, so analytics can
+# memory-map the history instead of walking it row by row (see
+# log_columns). The mirror needs numpy and is skipped without it.
+
+import copy
+import hashlib
+import itertools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+from aggregates import ensure_aggregates, update_aggregates
+from ledger import Ledger
+
+DATA_FILE = "finance_data.json"
+COMPACT_EVERY = 500
+
+# Attempts at a consistent read before returning a possibly stale one.
+READ_RETRIES = 5
+
+# Snapshot key holding the sequence number of the last record it contains.
+SEQ_KEY = "_journal_seq"
+MIRROR_CHUNK = 10000
+
+# Derived state that used to be persisted in the snapshot
+DERIVED_KEYS = ("rollups", "stats", "sketches")
+
+DEFAULT_DATA = {
+    "expenses": {
+        "food": [],
+        "transport": [],
+        "entertainment": [],
+        "utilities": [],
+        "shopping": [],
+    },
+    "income": 0,
+    "savings": 0,
+    "logs": [],
+    "family_profile": {
+        "married": False,
+        "spouse_income": 0,
+        "children": [],
+        "dependents": [],
+    },
+    "family": [],
+}
+
+
+def to_memory(data):
+    """finance_data.json schema -> in-memory form, with "expenses" and "logs" as ledger.Ledger."""
+    for key, build in (("expenses", Ledger.from_expenses), ("logs", Ledger.from_logs)):
+        value = data.get(key, {} if key == "expenses" else [])
+        if not isinstance(value, Ledger):
+            # Amounts finer than a paisa (hand-edited files) are rounded, not rejected
+            data[key] = build(value, exact=False)
+        elif value.read_only:
+            data[key] = value.copy()
+    return data
+
+
+def snapshot(data):
+    """A read-only copy of in-memory state that later writes won't touch."""
+    if isinstance(data, list):
+        # List stores only ever append whole entries
+        return list(data)
+    plain = {key: value for key, value in data.items() if not isinstance(value, Ledger)}
+    frozen = copy.deepcopy(plain)
+    frozen.update({key: value.view() for key, value in data.items() if isinstance(value, Ledger)})
+    return frozen
+
+
+def _dump_indented(value, f, depth):
+    f.write(json.dumps(value, indent=4).replace("\n", "\n" + "    " * depth))
+
+
+def dump_json(data, f):
+    """json.dump(data, f, indent=4) for in-memory state, writing ledger rows one at a time.
+
+    "expenses" and "logs" come out in the finance_data.json schema, and the
+    log dicts are never all built at once.
+    """
+    if not isinstance(data, dict):
+        json.dump(data, f, indent=4)
+        return
+    f.write("{")
+    for i, (key, value) in enumerate(data.items()):
+        f.write(("," if i else "") + "\n    " + json.dumps(key) + ": ")
+        if isinstance(value, Ledger) and key == "logs":
+            if not len(value):
+                f.write("[]")
+                continue
+            f.write("[")
+            for j, expense in enumerate(value):
+                f.write(("," if j else "") + "\n        ")
+                _dump_indented(expense.to_log(), f, 2)
+            f.write("\n    ]")
+        else:
+            _dump_indented(value.to_expenses() if isinstance(value, Ledger) else value, f, 1)
+    f.write("\n}" if data else "}")
+
+
+def apply_record(data, record):
+    """Apply one journal record to an in-memory data dict (see to_memory) and return it."""
+    op = record["op"]
+    if op == "add_expense":
+        category = record["category"]
+        aggregates = ensure_aggregates(data)
+        amount = data["expenses"].add_expense(category, record["amount"])
+        update_aggregates(aggregates, category, amount)
+        data["logs"].add_expense(category, amount, record["date"])
+    elif op == "set_income_savings":
+        data["income"] = record["income"]
+        data["savings"] = record["savings"]
+    elif op == "set_family_profile":
+        data["family_profile"] = record["family_profile"]
+    elif op == "add_family_member":
+        data.setdefault("family", []).append(record["member"])
+    elif op == "append_log":
+        # List-shaped stores such as data.json
+        data.append(record["entry"])
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+    return data
+
+
+def _write_tmp(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        dump_json(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+def _write_atomic(path, data):
+    # Write to a temp file and rename over the target so readers only ever
+    # see the old or the new snapshot, never a partial one.
+    os.replace(_write_tmp(path, data), path)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JournalStore:
+    def __init__(self, path=DATA_FILE, default=None, compact_every=COMPACT_EVERY, fsync=True):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.tmp_path = f"{path}.tmp"
+        self.mirror_base = f"{path}.logs"
+        self.default = DEFAULT_DATA if default is None else default
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._seq = 0
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._journal_offset = 0
+        self._cache = None
+        self._snapshot = None
+        self._bulk = 0
+        self._bulk_version = None
+
+    def version(self):
+        """(inode, mtime_ns, size) of the snapshot and journal; any write changes it."""
+        version = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    @contextmanager
+    def _write_lock(self):
+        # Writers serialize on the thread lock plus an exclusive lock on a
+        # sibling .lock file, so processes sharing the data directory can't
+        # interleave appends or compactions. Readers take neither.
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_path, "a+") as lock_file:
+                _lock_file(lock_file)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    _unlock_file(lock_file)
+
+    def _recover_snapshot(self):
+        # A list snapshot is written to .tmp, then the journal is emptied,
+        # then .tmp replaces the snapshot. Under the write lock a leftover
+        # .tmp means a crash: roll it forward if the journal was already
+        # emptied (it holds everything), otherwise the journal is intact and
+        # the half-finished .tmp is dropped.
+        with self._write_lock():
+            if not os.path.exists(self.tmp_path):
+                return
+            journal_empty = not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0
+            if journal_empty:
+                try:
+                    with open(self.tmp_path, "r") as f:
+                        json.load(f)
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    os.replace(self.tmp_path, self.path)
+                    return
+            os.remove(self.tmp_path)
+
+    def _read_snapshot(self):
+        if isinstance(self.default, list) and os.path.exists(self.tmp_path):
+            self._recover_snapshot()
+        if not os.path.exists(self.path):
+            with self._write_lock():
+                if not os.path.exists(self.path):
+                    _write_atomic(self.path, self.default)
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _read_journal(self, after_seq, repair=False, start=0, apply=None):
+        """Complete records after `after_seq` from byte `start` -> (records, end offset).
+
+        With `apply`, each record is handed to it as it is read instead of
+        being collected, and the returned list stays empty.
+        """
+        records = []
+        collect = records.append if apply is None else apply
+        if not os.path.exists(self.journal_path):
+            return records, 0
+        good_offset = start
+        with open(self.journal_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line: either an append still in flight (a
+                    # reader just stops here) or one interrupted by a crash,
+                    # which a writer cuts off so its append starts cleanly.
+                    if repair:
+                        with open(self.journal_path, "r+b") as out:
+                            out.truncate(good_offset)
+                    break
+                good_offset += len(line)
+                if record["seq"] > after_seq:
+                    collect(record)
+        return records, good_offset
+
+    @staticmethod
+    def _journal_grew(old, new):
+        # Same snapshot, journal only appended to since `old`
+        if old[0] != new[0] or new[1] is None:
+            return False
+        return old[1] is None or (old[1][0] == new[1][0] and new[1][2] > old[1][2])
+
+    def load(self, use_cache=True):
+        """A read-only snapshot of the current state, re-reading disk only if the version changed."""
+        data = self._load(use_cache)
+        with self._lock:
+            cache = self._cache
+            if cache is None or cache[1] is not data:
+                # Not the shared state: nobody else holds or changes it
+                return snapshot(data)
+            if self._snapshot is None or self._snapshot[0] != cache[0]:
+                self._snapshot = (cache[0], snapshot(data))
+            return self._snapshot[1]
+
+    def _load(self, use_cache=True, repair=False):
+        # repair=True only from writers holding the write lock
+        for _ in range(READ_RETRIES):
+            before = self.version()
+            cache = self._cache
+            if use_cache and cache is not None and cache[0] == before:
+                return cache[1]
+            if use_cache and cache is not None and self._journal_grew(cache[0], before):
+                # Other writers only appended: apply just the new tail
+                with self._lock:
+                    if self._cache is cache:
+                        records, self._journal_offset = self._read_journal(
+                            self._seq, repair=repair, start=self._journal_offset)
+                        for record in records:
+                            apply_record(cache[1], record)
+                            self._seq = record["seq"]
+                        self._pending += len(records)
+                        self._cache = (before, cache[1])
+                        return cache[1]
+                continue
+            data, seq, pending, offset = self._load_from_disk(repair=repair)
+            after = self.version()
+            # Nothing changed underneath the read (or we hold the write lock,
+            # so the only change can be our own repair): safe to share.
+            if after == before or repair:
+                with self._lock:
+                    if repair or self.version() == before:
+                        self._cache = (after, data)
+                        self._seq, self._pending, self._journal_offset = seq, pending, offset
+                return data
+            # A writer compacted or appended mid-read; read again.
+        # Still racing writers: read once more under the write lock, where
+        # nothing can change underneath us.
+        with self._write_lock():
+            return self._load(use_cache, repair=True)
+
+    def _load_from_disk(self, repair=False):
+        """Snapshot plus replayed journal -> (data, last seq, records, journal offset)."""
+        data = self._read_snapshot()
+        seq = 0
+        if isinstance(data, dict):
+            seq = data.pop(SEQ_KEY, 0)
+            for key in self.default:
+                if key not in data:
+                    data[key] = copy.deepcopy(self.default[key])
+            if "expenses" in data:
+                # Rollups, stats and sketches are rebuilt in memory from the
+                # logs (see ledger.Ledger.derived); drop copies older
+                # snapshots persisted.
+                for key in DERIVED_KEYS:
+                    data.pop(key, None)
+                to_memory(data)
+                ensure_aggregates(data)
+        # List snapshots can't carry a sequence number; save() empties their
+        # journal before the snapshot lands, so everything in it is newer.
+
+        replayed = 0
+
+        def replay(record):
+            nonlocal seq, replayed
+            apply_record(data, record)
+            seq = record["seq"]
+            replayed += 1
+
+        _, offset = self._read_journal(seq, repair=repair, apply=replay)
+        return data, seq, replayed, offset
+
+    def append(self, op, **fields):
+        """Durably append one mutation record to the journal."""
+        return self.append_many([{"op": op, **fields}])[0]
+
+    @contextmanager
+    def bulk(self):
+        """Suspend in-memory updates and compaction for a bulk import.
+
+        Inside the block, append_many only writes journal lines: records are
+        not applied to the cached state (which is dropped, so the next load
+        re-reads from disk) and the journal isn't compacted, so memory and
+        per-chunk cost don't grow with the rows written. The journal is
+        compacted once when the outermost block exits.
+        """
+        with self._lock:
+            self._bulk += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._bulk -= 1
+                done = not self._bulk
+                if done:
+                    self._bulk_version = None
+            if done:
+                self.compact()
+
+    def _sync_seq(self):
+        # Bulk mode: catch the sequence number up with other writers by
+        # reading only what they appended since our last write.
+        version = self.version()
+        if self._bulk_version is not None and version == self._bulk_version:
+            return
+        if self._bulk_version is not None and self._journal_grew(self._bulk_version, version):
+            records, self._journal_offset = self._read_journal(
+                self._seq, repair=True, start=self._journal_offset)
+            if records:
+                self._seq = records[-1]["seq"]
+            self._pending += len(records)
+        else:
+            # First bulk write, or the snapshot was replaced: full resync
+            self._load(repair=True)
+        self._cache = self._snapshot = None
+
+    def append_many(self, mutations):
+        """Append several {"op": ..., ...} mutations with one write and one fsync."""
+        with self._write_lock():
+            # Under the lock, bring the sequence number and cached state up
+            # to date with whatever other writers have committed.
+            if self._bulk:
+                self._sync_seq()
+            else:
+                data = self._load(repair=True)
+            records = []
+            for mutation in mutations:
+                self._seq += 1
+                records.append({"seq": self._seq, **mutation})
+            payload = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+            with open(self.journal_path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._journal_offset += len(payload)
+            self._pending += len(records)
+            if self._bulk:
+                # The cache (if a reader rebuilt one) is now behind our
+                # journal offset; drop it rather than apply the records.
+                self._cache = self._snapshot = None
+                self._bulk_version = self.version()
+                return records
+            for record in records:
+                apply_record(data, record)
+            self._cache = (self.version(), data)
+            if self._pending >= self.compact_every:
+                self.compact()
+            return records
+
+    def _mirror_logs(self, logs, extend):
+        # Compaction only ever adds rows after the ones already mirrored; a
+        # save() of arbitrary data may not, so it rebuilds the mirror.
+        try:
+            import columnar_logs
+        except ImportError:
+            return
+        written = columnar_logs.row_count(self.mirror_base)
+        if not extend or written > len(logs):
+            columnar_logs.remove_logs(self.mirror_base)
+            written = 0
+        writer = columnar_logs.ColumnarLogWriter(self.mirror_base)
+        rows = logs.rows(written)
+        while writer.append_many(itertools.islice(rows, MIRROR_CHUNK)):
+            pass
+
+    def log_columns(self, logs):
+        """(day numbers, paise) column segments covering a snapshot's `logs`.
+
+        The first segment is memory-mapped from the mirror when one exists;
+        the last holds the rows logged since, taken from the ledger.
+        """
+        segments = []
+        start = 0
+        try:
+            import columnar_logs
+        except ImportError:
+            columnar_logs = None
+        if columnar_logs is not None and columnar_logs.row_count(self.mirror_base):
+            mirror = columnar_logs.ColumnarLogs(self.mirror_base)
+            start = min(len(mirror), len(logs))
+            segments.append((mirror.dates[:start], mirror.amounts[:start]))
+        if start < len(logs):
+            segments.append(logs.columns(start))
+        return segments
+
+    def save(self, data):
+        """Write a full snapshot of `data` and discard the journal it covers."""
+        self._save(data, extend_mirror=False)
+
+    def _save(self, data, extend_mirror):
+        with self._write_lock():
+            if isinstance(data, dict):
+                if "expenses" in data:
+                    data = to_memory(dict(data))
+                snapshot = dict(data)
+                snapshot[SEQ_KEY] = self._seq
+                _write_atomic(self.path, snapshot)
+                if isinstance(snapshot.get("logs"), Ledger):
+                    self._mirror_logs(snapshot["logs"], extend_mirror)
+                # The snapshot already contains every journalled record, so
+                # the journal can be dropped; a crash before this line only
+                # means the next load skips records whose seq is <= the
+                # snapshot's.
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            else:
+                # No seq to skip replayed records by, so the journal must be
+                # gone before the new snapshot is visible; _recover_snapshot
+                # finishes the replace if we crash in between.
+                tmp_path = _write_tmp(self.path, data)
+                if os.path.exists(self.journal_path):
+                    with open(self.journal_path, "r+b") as f:
+                        f.truncate(0)
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            self._pending = 0
+            self._journal_offset = 0
+            self._cache = (self.version(), data)
+
+    def compact(self):
+        """Fold the journal into a new snapshot."""
+        with self._write_lock():
+            self._save(self._load(repair=True), extend_mirror=True)
+
+
+# -------------------- Per-user shards --------------------
+# Each user gets their own snapshot/journal pair under
+# DATA_DIR/<2-hex-digit bucket>/<sha1 of the user ID>/, so sessions for
+# different users never contend, and sessions for the same user serialize
+# their writes through that shard's lock file. The directory is named by the
+# full digest, not the ID itself: any ID ("f k", "o/k", "..") gets a
+# directory of its own inside its bucket. The default user keeps using
+# finance_data.json in the working directory.
+
+DATA_DIR = "user_data"
+DEFAULT_USER = "default"
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def user_data_path(user_id):
+    digest = hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()
+    return os.path.join(DATA_DIR, digest[:2], digest, DATA_FILE)
+
+
+def get_store(user_id=None):
+    if user_id is None or user_id == DEFAULT_USER:
+        return _default_store
+    with _stores_lock:
+        store = _stores.get(user_id)
+        if store is None:
+            path = user_data_path(user_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            store = _stores[user_id] = JournalStore(path, compact_every=COMPACT_EVERY)
+        return store
+
+
+_default_store = JournalStore()
+
+
+def load_data(user_id=None):
+    return get_store(user_id).load()
+
+
+def save_data(data, user_id=None):
+    get_store(user_id).save(data)
+
+
+def record_expense(category, amount, date=None, user_id=None):
+    if date is None:
+        date = str(datetime.now().date())
+    return get_store(user_id).append("add_expense", category=category, amount=amount, date=date)
+
+
+def record_income_savings(income, savings, user_id=None):
+    return get_store(user_id).append("set_income_savings", income=income, savings=savings)
+
+
+def record_family_profile(family_profile, user_id=None):
+    return get_store(user_id).append("set_family_profile", family_profile=family_profile)
+
+
+def record_family_member(member, user_id=None):
+    return get_store(user_id).append("add_family_member", member=member)
@@ -0,0 +1,119 @@
+# synth_data.py
+#
+# Synthetic datasets in the app's existing schemas, for benchmarks and load
+# tests:
+#   - log lists shaped like data.json: [{"date", "category", "amount"}, ...]
+#   - finance data shaped like finance_data.json (expenses dict-of-lists,
+#     logs, income/savings, family profile)
+#   - chat lines for the intent parser
+# Rows mimic data.json: 12 roughly uniform categories, amounts of 50-1000
+# with paise, and about 4 entries a day, packed denser at large sizes so the
+# dates stay within ten years. Output is deterministic for a given seed.
+#
+#   python synth_data.py --rows 1000000 --kind logs --out logs_1m.json
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+CATEGORIES = [
+    "bills", "books", "clothes", "food", "friends", "fun",
+    "gifts", "glasses", "medicine", "others", "tech", "travel",
+]
+START_DATE = date(2024, 4, 1)
+ROWS_PER_DAY = 4
+MAX_DAYS = 3650
+
+CHAT_TEMPLATES = [
+    "Add expense of {amount} for {category}",
+    "add expense {amount} for {category} today",
+    "How much did I spend on {category}?",
+    "Show my spending analysis",
+    "where i spend the most",
+    "How are my savings doing",
+    "Any advice on budgeting?",
+    "Can you suggest a family plan",
+    "what is the weather like",
+]
+
+
+def rows_per_day(rows):
+    return max(ROWS_PER_DAY, -(-rows // MAX_DAYS))
+
+
+def iter_logs(rows, seed=0, start=START_DATE, categories=CATEGORIES):
+    """Yield `rows` log dicts in date order."""
+    rng = random.Random(seed)
+    per_day = rows_per_day(rows)
+    for i in range(rows):
+        yield {
+            "date": (start + timedelta(days=i // per_day)).isoformat(),
+            "category": rng.choice(categories),
+            "amount": round(rng.uniform(50, 1000), 2),
+        }
+
+
+def generate_logs(rows, seed=0):
+    return list(iter_logs(rows, seed))
+
+
+def generate_finance_data(rows, seed=0):
+    """A finance_data.json-shaped dict with `rows` expenses, matching logs."""
+    logs = generate_logs(rows, seed)
+    expenses = {cat: [] for cat in CATEGORIES}
+    for log in logs:
+        expenses[log["category"]].append(log["amount"])
+    rng = random.Random(seed + 1)
+    return {
+        "income": 60000,
+        "savings": 250000,
+        "expenses": expenses,
+        "logs": logs,
+        "family_profile": {
+            "married": True,
+            "spouse_income": 40000,
+            "children": [rng.randint(0, 17) for _ in range(2)],
+            "dependents": ["Father", "Mother"],
+        },
+    }
+
+
+def iter_chat_lines(rows, seed=0):
+    rng = random.Random(seed)
+    for _ in range(rows):
+        yield rng.choice(CHAT_TEMPLATES).format(
+            amount=rng.randint(10, 5000), category=rng.choice(CATEGORIES)
+        )
+
+
+def write_logs_json(path, rows, seed=0):
+    # Streamed one row at a time, so 10^7 rows never sit in memory at once
+    with open(path, "w") as f:
+        f.write("[")
+        for i, log in enumerate(iter_logs(rows, seed)):
+            f.write(",\n" if i else "\n")
+            f.write(json.dumps(log))
+        f.write("\n]\n")
+
+
+def write_finance_data(path, rows, seed=0):
+    with open(path, "w") as f:
+        json.dump(generate_finance_data(rows, seed), f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic finance datasets.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--kind", choices=["logs", "finance", "chat"], default="logs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    if args.kind == "logs":
+        write_logs_json(args.out, args.rows, args.seed)
+    elif args.kind == "finance":
+        write_finance_data(args.out, args.rows, args.seed)
+    else:
+        with open(args.out, "w") as f:
+            for line in iter_chat_lines(args.rows, args.seed):
+                f.write(line + "\n")
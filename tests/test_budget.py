@@ -0,0 +1,44 @@
+import itertools
+import random
+
+import pytest
+
+from budget import EXACT_LIMIT, allocate_budget, category_priority
+
+CATEGORIES = ["Rent", "Food", "Travel", "Shopping", "Medicine", "Fun"]
+
+
+def _brute_force(income, items):
+    weighted = [(amount, category_priority(category) * amount) for category, amount in items]
+    best = 0
+    for size in range(len(weighted) + 1):
+        for subset in itertools.combinations(weighted, size):
+            if sum(amount for amount, _ in subset) <= income:
+                best = max(best, sum(value for _, value in subset))
+    return best
+
+
+def _cases(count=200, max_items=10, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        items = [
+            (rng.choice(CATEGORIES), rng.choice([rng.randint(1, 5000), round(rng.uniform(1, 5000), 2)]))
+            for _ in range(rng.randint(0, max_items))
+        ]
+        income = rng.randint(0, int(sum(amount for _, amount in items)) + 1)
+        yield income, items
+
+
+@pytest.mark.parametrize("income, items", list(_cases()))
+def test_allocators_against_brute_force(income, items):
+    best = _brute_force(income, items)
+
+    plan = allocate_budget(income, items)
+    assert len(items) <= EXACT_LIMIT and plan["method"] == "exact"
+    assert plan["allocated"] <= income
+    assert plan["value"] == pytest.approx(best)
+
+    # Forcing the greedy path keeps the 1/2-approximation guarantee
+    plan = allocate_budget(income, items, exact_limit=0)
+    assert plan["allocated"] <= income
+    assert plan["value"] >= best / 2 - 1e-9
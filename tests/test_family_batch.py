@@ -0,0 +1,42 @@
+import copy
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from family_advisor import generate_family_advice_summary
+from family_batch import format_household, generate_family_advice_batch, households_from_records
+
+RECORDS = [
+    {"income": 50000, "savings": 1500, "expenses": {"Food": [1000, 500]},
+     "family_profile": {"married": True, "spouse_income": 30000, "children": [4, 19]}},
+    {"income": 42000.5, "savings": 250000, "expenses": {"Rent": [12000], "Food": [250.25]},
+     "family_profile": {"married": False, "children": [12]}},
+    {"income": 0, "savings": 0, "expenses": {},
+     "family_profile": {"married": True, "spouse_income": 0}},
+    {"income": 1500, "savings": 1500.0, "expenses": {"Travel": [2500]},
+     "family_profile": {"married": True, "spouse_income": 20000.0, "children": []}},
+]
+
+
+def _scalar(record):
+    summary = generate_family_advice_summary(copy.deepcopy(record))
+    del summary["🕒 Last Updated"]
+    return summary
+
+
+@pytest.mark.parametrize("workers, shard_size", [(None, 1000), (2, 2)])
+def test_batch_renders_exactly_like_the_scalar_path(workers, shard_size):
+    records = copy.deepcopy(RECORDS)
+    result = generate_family_advice_batch(households_from_records(records), workers=workers, shard_size=shard_size)
+    for i, record in enumerate(RECORDS):
+        # Compared as repr, since 1500 == 1500.0 would hide a type mismatch
+        assert repr(format_household(result, i)) == repr(_scalar(record))
+    # Whole-rupee households keep their ints even next to float ones
+    assert "Current savings: ₹1,500\n" in format_household(result, 0)["💼 Emergency Fund"]
+
+
+def test_building_the_table_leaves_records_alone():
+    records = copy.deepcopy(RECORDS)
+    households_from_records(records)
+    assert records == RECORDS
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from intent_router import IntentRouter
+
+
+class StandInModel:
+    """Local stand-in for the zero-shot classifier: a fixed text -> (label, score) table."""
+
+    def __init__(self, answers, drop_last=False):
+        self.answers = answers
+        self.drop_last = drop_last
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        results = [self.answers.get(text, ("unknown", 0.0)) for text in texts]
+        return results[:-1] if self.drop_last else results
+
+
+def test_regex_hits_never_reach_the_model():
+    model = StandInModel({})
+    router = IntentRouter(model=model)
+    assert router.route("Add expense of 300 for food") == ("add_expense", {"amount": 300, "category": "Food"})
+    assert model.calls == [] and router.stats["regex"] == 1
+
+
+def test_misses_are_classified_in_one_batch_and_memoized():
+    model = StandInModel({"tips please": ("suggestion", 0.9), "show my stuff": ("show_expenses", 0.8),
+                          "meh": ("suggestion", 0.2)})
+    router = IntentRouter(model=model, batch_wait=0.05)
+    results = router.route_batch(["Tips please", "show my stuff", "meh", "tips please"])
+    assert results == [("suggestion", {}), ("spending_analysis", {}), ("unknown", {}), ("suggestion", {})]
+    assert sorted(map(sorted, model.calls)) == [["meh", "show my stuff", "tips please"]]
+
+    assert router.route("TIPS please") == ("suggestion", {})
+    assert router.stats["memo"] == 1 and len(model.calls) == 1
+
+
+def test_short_model_output_falls_back_without_waiting_for_the_timeout():
+    model = StandInModel({"first": ("suggestion", 0.9), "second": ("suggestion", 0.9)}, drop_last=True)
+    router = IntentRouter(model=model, batch_wait=0.05, timeout=5)
+    started = time.perf_counter()
+    results = router.route_batch(["first", "second"])
+    assert time.perf_counter() - started < 1
+    # Whichever text the model dropped gets the rule-based answer
+    assert sorted(results) == [("suggestion", {}), ("unknown", {})]
+    # and is left out of the memo, so it reaches the model again
+    model.drop_last = False
+    assert router.route_batch(["first", "second"]) == [("suggestion", {}), ("suggestion", {})]
+
+
+def test_model_errors_degrade_to_unknown():
+    def broken(texts):
+        raise RuntimeError("model not downloaded")
+
+    router = IntentRouter(model=broken)
+    assert router.route("something odd") == ("unknown", {})
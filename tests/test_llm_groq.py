@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import llm_groq
+from llm_cache import ResponseCache
+
+
+def _sse(*tokens, done=True):
+    events = [
+        {"choices": [{"delta": {"content": token}}]} for token in tokens
+    ]
+    lines = [f"data: {json.dumps(event)}\n\n" for event in events]
+    if done:
+        lines.append("data: [DONE]\n\n")
+    return [line.encode("utf-8") for line in lines]
+
+
+class StubGroq(BaseHTTPRequestHandler):
+    # Each POST pops the next scripted reply: (status, chunks, disconnect)
+    protocol_version = "HTTP/1.1"
+    replies = []
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests_seen.append(json.loads(body))
+        status, chunks, disconnect = self.replies.pop(0)
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+        if disconnect:
+            # Drop the connection without the terminating zero-length chunk
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def groq(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGroq)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubGroq.replies, StubGroq.requests_seen = [], []
+    client = llm_groq.GroqClient(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_port}", max_retries=2, backoff_base=0
+    )
+    monkeypatch.setattr(llm_groq, "_default_client", client)
+    monkeypatch.setattr(llm_groq, "_response_cache", ResponseCache(str(tmp_path / "llm_cache.db")))
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_yields_sse_chunks_in_order(groq):
+    StubGroq.replies.append((200, _sse("Save ", "more, ", "spend less."), False))
+    assert list(groq.stream("hi")) == ["Save ", "more, ", "spend less."]
+    assert StubGroq.requests_seen[0]["stream"] is True
+
+
+def test_stream_retries_after_429(groq):
+    StubGroq.replies += [(429, [], False), (200, _sse("ok"), False)]
+    assert list(groq.stream("hi")) == ["ok"]
+    assert len(StubGroq.requests_seen) == 2
+
+
+def test_mid_stream_disconnect_is_reported_and_not_cached(groq):
+    StubGroq.replies.append((200, _sse("partial ", "answer", done=False)[:1], True))
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        list(groq.stream("hi"))
+
+    StubGroq.replies.append((200, _sse("partial ", "answer", done=False)[:1], True))
+    tokens = list(llm_groq.stream_groq_llm("hi"))
+    assert tokens[0] == "partial " and tokens[-1].startswith("\n\n❌ Error:")
+
+    # The cut-off answer was not cached, so the next call asks the server again
+    StubGroq.replies.append((200, _sse("full answer"), False))
+    assert list(llm_groq.stream_groq_llm("hi")) == ["full answer"]
+    assert list(llm_groq.stream_groq_llm("hi")) == ["full answer"]
+    assert len(StubGroq.requests_seen) == 3
+
+
+def test_concurrent_first_calls_share_one_client_and_cache(tmp_path, monkeypatch):
+    built = []
+
+    class SlowClient:
+        def __init__(self):
+            built.append(self)
+            time.sleep(0.05)  # widen the window between the check and the assignment
+
+    monkeypatch.setattr(llm_groq, "GroqClient", SlowClient)
+    monkeypatch.setattr(llm_groq, "_default_client", None)
+    monkeypatch.setattr(llm_groq, "_response_cache", None)
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: llm_groq.get_client(), range(8)))
+        caches = list(pool.map(lambda _: llm_groq.get_response_cache(), range(8)))
+    assert len(built) == 1 and all(client is built[0] for client in clients)
+    assert all(cache is caches[0] for cache in caches)
@@ -0,0 +1,62 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from ledger import Ledger
+from online_stats import EWMA_ALPHA, ensure_stats, variance
+
+
+def _logs(count=2000, seed=3):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        {"date": (start + timedelta(days=i // 10)).isoformat(),
+         "category": rng.choice(["Food", "Rent", "Travel"]),
+         # Large offset and small spread: the case naive sum-of-squares gets wrong
+         "amount": round(1_000_000 + rng.gauss(0, 25), 2)}
+        for i in range(count)
+    ]
+
+
+def _two_pass(amounts):
+    mean = sum(amounts) / len(amounts)
+    return mean, sum((x - mean) ** 2 for x in amounts) / len(amounts)
+
+
+def _ewma(amounts):
+    # Closed form of the recurrence seeded with the first amount
+    n = len(amounts)
+    total = (1 - EWMA_ALPHA) ** (n - 1) * amounts[0]
+    for k in range(1, n):
+        total += EWMA_ALPHA * (1 - EWMA_ALPHA) ** (n - 1 - k) * amounts[k]
+    return total
+
+
+def _check(stats, logs):
+    assert stats["rows"] == len(logs)
+    for category, cat in stats["categories"].items():
+        amounts = [log["amount"] for log in logs if log["category"] == category]
+        mean, var = _two_pass(amounts)
+        assert cat["n"] == len(amounts)
+        assert cat["mean"] == pytest.approx(mean, rel=1e-12)
+        assert variance(cat) == pytest.approx(var, rel=1e-6)
+        assert cat["ewma"] == pytest.approx(_ewma(amounts), rel=1e-12)
+
+
+def test_welford_and_ewma_match_two_pass_in_one_go():
+    logs = _logs()
+    _check(ensure_stats({"logs": logs}), logs)
+
+
+def test_incremental_extension_matches_two_pass():
+    logs = _logs()
+    data = {"logs": []}
+    ledger = Ledger(exact=False)
+    for start in range(0, len(logs), 137):
+        for log in logs[start:start + 137]:
+            data["logs"].append(log)
+            ledger.add_expense(log["category"], log["amount"], log["date"])
+        _check(ensure_stats(data), data["logs"])
+        # A ledger's stats are memoized on it and extended the same way
+        _check(ensure_stats({"logs": ledger}), data["logs"])
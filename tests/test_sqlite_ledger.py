@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+
+import dsa_algos
+from ledger import Ledger
+from sqlite_ledger import SQLiteLedger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ledger():
+    ledger = SQLiteLedger(":memory:")
+    ledger.import_json_stores(
+        os.path.join(ROOT, "finance_data.json"),
+        os.path.join(ROOT, "data.json"),
+        os.path.join(ROOT, "expenses.json"),
+    )
+    return ledger
+
+
+def test_totals_match_dsa_algos():
+    with open(os.path.join(ROOT, "finance_data.json")) as f:
+        data = json.load(f)
+    expected = dsa_algos.total_expenses_by_category(data["expenses"])
+    totals = _ledger().total_expenses_by_category()
+    assert {cat: total for cat, total in expected.items() if total} == totals
+
+
+def test_monthly_summary_matches_logs():
+    with open(os.path.join(ROOT, "finance_data.json")) as f:
+        data = json.load(f)
+    assert _ledger().monthly_expense_summary() == dsa_algos.monthly_expense_summary(data)
+
+
+def test_each_source_counted_once():
+    ledger = _ledger()
+    everything = ledger.total_expenses_by_category(source=None)
+    lists = ledger.total_expenses_by_category()
+    logs = ledger.total_expenses_by_category(source="finance_data.logs")
+    assert everything["Books"] == lists["Books"] + logs["Books"]
+    ledger.add_expense("Books", 100, "2025-04-24")
+    assert ledger.total_expenses_by_category()["Books"] == lists["Books"] + 100
+    assert ledger.range_sum("Books", "2025-04-22", "2025-04-24") == logs["Books"] + 100
+
+
+def test_totals_are_exact_and_match_the_ledger():
+    with open(os.path.join(ROOT, "finance_data.json")) as f:
+        data = json.load(f)
+    ledger = _ledger()
+    expected = Ledger.from_expenses(data["expenses"], exact=False).category_totals()
+    # Compared as repr, so a drifted float (or 1500.0 for 1500) can't pass
+    totals = ledger.total_expenses_by_category()
+    assert repr(sorted(totals.items())) == repr(sorted((cat, t) for cat, t in expected.items() if t))
+
+    ledger.add_expenses([("Drift", 0.1, None)] * 10)
+    assert repr(ledger.total_expenses_by_category()["Drift"]) == "1"
+
+
+def test_importing_twice_counts_nothing_twice():
+    ledger = _ledger()
+    ledger.add_expense("Books", 100, "2025-04-24")
+    before = ledger.total_expenses_by_category(source=None)
+    ledger.import_json_stores(
+        os.path.join(ROOT, "finance_data.json"),
+        os.path.join(ROOT, "data.json"),
+        os.path.join(ROOT, "expenses.json"),
+    )
+    assert ledger.total_expenses_by_category(source=None) == before
+
+
+def test_opening_a_real_amount_database_migrates_it(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE expenses (id INTEGER PRIMARY KEY, category TEXT NOT NULL, amount REAL NOT NULL, "
+        "date TEXT, source TEXT NOT NULL DEFAULT 'app')"
+    )
+    conn.execute("CREATE INDEX idx_expenses_date ON expenses (date)")
+    conn.executemany("INSERT INTO expenses (category, amount, date) VALUES (?, ?, ?)",
+                     [("Food", 978.94, "2025-04-01"), ("Food", 0.06, "2025-04-02")])
+    conn.commit()
+    conn.close()
+
+    ledger = SQLiteLedger(path)
+    assert ledger.total_expenses_by_category() == {"Food": 979}
+    ledger.add_expense("Food", 1, "2025-04-03")
+    assert ledger.range_sum("Food", "2025-04-01", "2025-04-30") == 980
@@ -0,0 +1,22 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE = "import sys; import chatbot; print('@@', ','.join(m for m in ('pandas', 'matplotlib') if m in sys.modules))"
+
+
+def test_chatbot_start_leaves_pandas_and_matplotlib_unloaded(tmp_path):
+    # With logs present, so every expander has something it could draw
+    shutil.copy(os.path.join(ROOT, "finance_data.json"), tmp_path)
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=tmp_path, capture_output=True, text=True, check=True,
+        env={**os.environ, "FINANCE_PREWARM": "0", "PYTHONPATH": ROOT},
+    )
+    probe = [line for line in proc.stdout.splitlines() if line.startswith("@@")][-1]
+    assert probe == "@@ "
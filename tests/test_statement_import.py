@@ -0,0 +1,68 @@
+import json
+import os
+from datetime import date
+
+import storage
+import statement_import
+
+
+def _store(tmp_path):
+    return storage.JournalStore(str(tmp_path / "finance_data.json"), compact_every=2, fsync=False)
+
+
+def _write_json(path, rows):
+    with open(path, "w") as f:
+        json.dump(rows, f)
+    return str(path)
+
+
+def test_reimport_is_a_no_op_and_compacts_once(tmp_path):
+    rows = [{"date": f"2024-04-{day:02d}", "category": "food", "amount": 100.5} for day in range(1, 21)]
+    rows.append(dict(rows[0]))  # a legitimate second identical purchase
+    path = _write_json(tmp_path / "statement.json", rows)
+    store = _store(tmp_path)
+
+    stats = statement_import.import_statement(path, store, chunk_size=4)
+    assert (stats["imported"], stats["duplicates"]) == (21, 0)
+    # Compaction was held back until the end, then folded the whole journal
+    assert not os.path.exists(store.journal_path)
+
+    stats = statement_import.import_statement(path, store, chunk_size=4)
+    assert (stats["imported"], stats["duplicates"]) == (0, 21)
+    assert len(_store(tmp_path).load()["logs"]) == 21
+
+
+def test_signed_amount_column_skips_credits(tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "Date,Description,Amount\n"
+        "01/04/2024,Coffee shop,-120.50\n"
+        "02/04/2024,Salary,50000\n"
+        "03/04/2024,Rent,\"(9,000)\"\n"
+    )
+    store = _store(tmp_path)
+    stats = statement_import.import_statement(str(path), store)
+    assert (stats["imported"], stats["skipped"]) == (2, 1)
+    assert [(log["category"], log["amount"]) for log in store.load()["logs"]] == [("Coffee", 120.5), ("Rent", 9000)]
+
+
+def test_positive_expense_lists_skip_refunds_and_credit_rows(tmp_path):
+    path = _write_json(tmp_path / "logs.json", [
+        {"date": "2024-04-01", "category": "food", "amount": 300},
+        {"date": "2024-04-02", "category": "food", "amount": 250, "Dr/Cr": "CR"},
+        {"date": "2024-04-03", "category": "gifts", "withdrawal": "1,200"},
+    ])
+    store = _store(tmp_path)
+    stats = statement_import.import_statement(path, store)
+    assert (stats["imported"], stats["skipped"]) == (2, 1)
+    assert store.load()["expenses"].category_totals() == {
+        **dict.fromkeys(storage.DEFAULT_DATA["expenses"], 0), "Food": 300, "Gifts": 1200,
+    }
+
+
+def test_dedup_window_forgets_old_days():
+    index = statement_import.DedupIndex(window_days=2)
+    log = {"date": "2024-04-01", "category": "Food", "amount": 10}
+    assert not index.is_duplicate(log)
+    index.is_duplicate({"date": "2024-04-10", "category": "Food", "amount": 10})
+    assert list(index.seen) == [date(2024, 4, 10).toordinal()]
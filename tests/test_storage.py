@@ -0,0 +1,118 @@
+import copy
+import json
+import os
+
+import pytest
+
+import storage
+from aggregates import ensure_rollups, monthly_totals
+from online_stats import ensure_stats
+from sketches import ensure_sketches
+
+
+def _store(tmp_path, **kwargs):
+    return storage.JournalStore(str(tmp_path / "finance_data.json"), **kwargs)
+
+
+def test_derived_state_stays_out_of_the_snapshot(tmp_path):
+    store = _store(tmp_path, compact_every=3)
+    for day in range(1, 5):
+        store.append("add_expense", category="Food", amount=100 * day, date=f"2024-04-0{day}")
+    data = store.load()
+    ensure_rollups(data), ensure_stats(data), ensure_sketches(data)
+    store.compact()
+
+    with open(store.path) as f:
+        snapshot = json.load(f)
+    assert not set(storage.DERIVED_KEYS) & snapshot.keys()
+    assert snapshot["logs"][-1] == {"date": "2024-04-04", "category": "Food", "amount": 400}
+
+    # A fresh process rebuilds them from the logs
+    assert monthly_totals(_store(tmp_path).load()) == {"2024-04": 1000.0}
+
+
+def test_extending_derived_state_leaves_earlier_values_alone(tmp_path):
+    store = _store(tmp_path)
+    store.append("add_expense", category="Food", amount=100, date="2024-04-01")
+    data = store.load()
+    before = ensure_rollups(data), ensure_stats(data), ensure_sketches(data)
+    frozen = copy.deepcopy(before)
+
+    store.append("add_expense", category="Food", amount=250, date="2024-04-01")
+    store.append("add_expense", category="Rent", amount=9000, date="2024-05-01")
+    data = store.load()
+    after = ensure_rollups(data), ensure_stats(data), ensure_sketches(data)
+
+    assert before == frozen
+    assert after[0]["month"] == {"Food": {"2024-04": 350.0}, "Rent": {"2024-05": 9000.0}}
+    assert after[1]["categories"]["Food"]["n"] == 2
+
+
+def test_load_returns_snapshots_later_writes_leave_alone(tmp_path):
+    store = _store(tmp_path)
+    store.append("add_expense", category="Food", amount=100, date="2024-04-01")
+    first = store.load()
+    assert store.load() is first  # shared until the next write
+
+    store.append("add_expense", category="Rent", amount=9000, date="2024-04-02")
+    store.append("set_income_savings", income=50000, savings=1000)
+    second = store.load()
+
+    assert len(first["logs"]) == 1 and first["income"] == 0
+    assert first["expenses"].category_totals() == {**dict.fromkeys(storage.DEFAULT_DATA["expenses"], 0), "Food": 100}
+    assert [log["category"] for log in second["logs"]] == ["Food", "Rent"]
+    assert second["aggregates"]["Rent"]["total"] == 9000
+
+
+def test_saving_a_snapshot_keeps_the_store_writable(tmp_path):
+    store = _store(tmp_path)
+    store.append("add_expense", category="Food", amount=100, date="2024-04-01")
+    data = dict(store.load())
+    data["income"] = 1234
+    store.save(data)
+    store.append("add_expense", category="Food", amount=50, date="2024-04-02")
+    reloaded = _store(tmp_path).load()
+    assert reloaded["income"] == 1234
+    assert reloaded["expenses"].category_totals()["Food"] == 150
+
+
+def test_compaction_extends_the_columnar_mirror(tmp_path):
+    pytest.importorskip("numpy")
+    store = _store(tmp_path, compact_every=3)
+    for day in range(1, 8):
+        store.append("add_expense", category="Food" if day % 2 else "Rent", amount=10.5 * day, date=f"2024-04-0{day}")
+    data = store.load()
+
+    segments = store.log_columns(data["logs"])
+    assert len(segments) == 2  # mirrored through the last compaction, then the ledger tail
+    days = [int(day) for part, _ in segments for day in part]
+    paise = [int(amount) for _, part in segments for amount in part]
+    expected_days, expected_paise = data["logs"].columns()
+    assert days == list(expected_days) and paise == list(expected_paise)
+
+    # An arbitrary save rebuilds the mirror instead of extending it
+    store.save({**data, "logs": data["logs"][:2]})
+    assert [len(part) for part, _ in store.log_columns(store.load()["logs"])] == [2]
+
+
+def test_every_user_id_gets_its_own_shard_inside_the_data_dir():
+    ids = ["f k", "f_k", "o/k", "o_k", ".", "..", "", "Ω"]
+    paths = [storage.user_data_path(user_id) for user_id in ids]
+    assert len(set(map(os.path.dirname, paths))) == len(ids)
+    root = os.path.abspath(storage.DATA_DIR)
+    for path in paths:
+        # <DATA_DIR>/<bucket>/<shard>/finance_data.json, never above it
+        assert os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(path)))) == root
+
+
+def test_family_helpers_leave_the_shared_snapshot_alone(tmp_path, monkeypatch):
+    import family
+
+    store = _store(tmp_path, default={"income": 0})  # a file from before "family" was a default
+    monkeypatch.setattr(storage, "_default_store", store)
+    assert family.load_data()["family"] == [] and "family" not in store.load()
+
+    family.add_family_member("Asha", 7, "daughter", False)
+    members = family.get_family_members()
+    members.append({"name": "intruder"})
+    assert [member["name"] for member in store.load()["family"]] == ["Asha"]
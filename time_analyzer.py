@@ -1,30 +1,61 @@
 # time_analyzer.py
 
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+from range_index import DateRangeIndex, months_before
+from aggregates import ensure_rollups, average_monthly_from_rollups
+import metrics
 
 # Prepares a prefix sum-style structure per category
+# (accepts a list of log dicts or a memory-mapped columnar_logs.ColumnarLogs)
 def build_category_prefix_logs(logs):
-    df = pd.DataFrame(logs)
-    df["amount"] = df["amount"].astype(float)
-    df["date"] = pd.to_datetime(df["date"])
-    return df
+    with metrics.span("finance_stage_seconds", stage="dataframe_build"):
+        if hasattr(logs, "to_dataframe"):
+            return logs.to_dataframe()
+        import pandas as pd  # deferred until a DataFrame is actually needed
+        df = pd.DataFrame(logs)
+        df["amount"] = df["amount"].astype(float)
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+# Builds the Fenwick-tree range-sum index; the queries below accept it in place of a DataFrame
+def build_range_index(logs):
+    return DateRangeIndex.from_logs(logs)
 
 # Returns total expense for a category over N days
 def expense_last_n_days(df, category, days):
+    if isinstance(df, DateRangeIndex):
+        return df.expense_last_n_days(category, days)
     recent_date = df["date"].max()
     from_date = recent_date - timedelta(days=days)
     filtered = df[(df["category"] == category) & (df["date"] >= from_date)]
     return filtered["amount"].sum()
 
 # Returns average monthly expense per category
+# (also accepts the finance data dict, answered from its monthly rollups)
 def average_monthly_expense(df):
-    df["month"] = df["date"].dt.to_period("M")
-    return df.groupby(["category", "month"])["amount"].sum().groupby("category").mean().to_dict()
+    if isinstance(df, DateRangeIndex):
+        return df.average_monthly_expense()
+    if isinstance(df, dict):
+        return average_monthly_from_rollups(df)
+    month = df["date"].dt.to_period("M").rename("month")
+    return df.groupby(["category", month])["amount"].sum().groupby("category").mean().to_dict()
 
 # Returns category with max average spending in last N months
 def highest_avg_spending_category(df, months):
+    if isinstance(df, DateRangeIndex):
+        return df.highest_avg_spending_category(months)
+    if isinstance(df, dict):
+        max_date = ensure_rollups(df)["max_date"]
+        if max_date is None:
+            return "No data available."
+        from_date = months_before(date.fromisoformat(max_date), months).isoformat()
+        avg = average_monthly_from_rollups(df, from_date)
+        if not avg:
+            return "No data available."
+        max_cat = max(avg, key=avg.get)
+        return f"📈 Highest average spending category in last {months} months: {max_cat} (₹{avg[max_cat]:.2f})"
+    import pandas as pd
     recent_date = df["date"].max()
     from_date = recent_date - pd.DateOffset(months=months)
     df = df[df["date"] >= from_date]
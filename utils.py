@@ -1,9 +1,12 @@
-import json
+from storage import JournalStore
+
+_store = JournalStore("data.json", default=[])
 
 def load_data():
-    with open("data.json", "r") as file:
-        return json.load(file)
+    return _store.load()
 
 def save_data(data):
-    with open("data.json", "w") as file:
-        json.dump(data, file, indent=4)
+    _store.save(data)
+
+def append_log(entry):
+    return _store.append("append_log", entry=entry)
@@ -1,19 +1,126 @@
-import matplotlib.pyplot as plt
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
 import streamlit as st
 
-def show_pie_chart(expenses):
-    totals = {k: sum(v) for k, v in expenses.items()}
+import metrics
+
+# Charts are drawn on standalone Figure objects (not pyplot), so nothing is
+# registered globally and each figure is freed as soon as it is rendered.
+# The PNG bytes are cached by a hash of the totals being plotted, so an
+# unchanged chart is never re-rendered. matplotlib itself is only imported
+# on the first cache miss.
+
+CACHE_SIZE = 64
+MAX_CONCURRENT_RENDERS = 2
+MAX_POINTS = 1000
+EPOCH = date(1970, 1, 1)
+MINOR_UNITS = 100
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_render_slots = threading.BoundedSemaphore(MAX_CONCURRENT_RENDERS)
+
+def _totals(expenses, totals=None):
+    if totals is not None:
+        return totals
+    return {k: sum(v) for k, v in expenses.items()}
+
+def _key(kind, payload):
+    blob = json.dumps([kind, payload], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _render(kind, payload, draw):
+    key = _key(kind, payload)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    with _render_slots, metrics.span("finance_stage_seconds", stage="chart_render", chart=kind):
+        from matplotlib.figure import Figure
+        fig = Figure()
+        ax = fig.subplots()
+        draw(ax)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        fig.clear()
+    image = buffer.getvalue()
+
+    with _cache_lock:
+        _cache[key] = image
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return image
+
+def downsample(xs, ys, max_points=MAX_POINTS):
+    # Min/max per bucket: keeps spikes visible with at most max_points points
+    n = len(ys)
+    if n <= max_points:
+        return list(xs), list(ys)
+    buckets = max_points // 2
+    out_x, out_y = [], []
+    for b in range(buckets):
+        start, end = b * n // buckets, (b + 1) * n // buckets
+        if start == end:
+            continue
+        if hasattr(ys, "argmin"):
+            # NumPy arrays (e.g. memory-mapped columns): only the bucket's
+            # pages are read
+            window = ys[start:end]
+            lo, hi = start + int(window.argmin()), start + int(window.argmax())
+        else:
+            window = range(start, end)
+            lo = min(window, key=ys.__getitem__)
+            hi = max(window, key=ys.__getitem__)
+        for i in sorted({lo, hi}):
+            out_x.append(xs[i])
+            out_y.append(ys[i])
+    return out_x, out_y
+
+def show_pie_chart(expenses, totals=None):
+    totals = _totals(expenses, totals)
     categories = list(totals.keys())
     values = list(totals.values())
 
-    fig, ax = plt.subplots()
-    ax.pie(values, labels=categories, autopct='%1.1f%%')
-    st.pyplot(fig)
-
-def show_bar_chart(expenses):
-    totals = {k: sum(v) for k, v in expenses.items()}
-    fig, ax = plt.subplots()
-    ax.bar(totals.keys(), totals.values(), color="skyblue")
-    ax.set_ylabel("Amount ₹")
-    ax.set_title("Spending by Category")
-    st.pyplot(fig)
+    def draw(ax):
+        ax.pie(values, labels=categories, autopct='%1.1f%%')
+
+    st.image(_render("pie", totals, draw))
+
+def show_bar_chart(expenses, totals=None):
+    totals = _totals(expenses, totals)
+
+    def draw(ax):
+        ax.bar(list(totals.keys()), list(totals.values()), color="skyblue")
+        ax.set_ylabel("Amount ₹")
+        ax.set_title("Spending by Category")
+
+    st.image(_render("bar", totals, draw))
+
+def show_expense_series(segments, title="Every expense over time", max_points=MAX_POINTS):
+    # segments: (day numbers since 1970-01-01, amounts in paise) column
+    # pairs, as from JournalStore.log_columns; each gets a share of
+    # max_points in proportion to its length
+    n = sum(len(ys) for _, ys in segments)
+    xs, ys = [], []
+    for days, paise in segments:
+        if not len(paise):
+            continue
+        part_x, part_y = downsample(days, paise, max(max_points * len(paise) // n, 2))
+        xs += [(EPOCH + timedelta(days=int(day))).isoformat() for day in part_x]
+        ys += [int(amount) / MINOR_UNITS for amount in part_y]
+
+    def draw(ax):
+        ax.plot(range(len(xs)), ys, color="steelblue", linewidth=0.8)
+        step = max(len(xs) // 8, 1)
+        ax.set_xticks(range(0, len(xs), step))
+        ax.set_xticklabels(xs[::step], rotation=30, ha="right")
+        ax.set_ylabel("Amount ₹")
+        ax.set_title(title)
+
+    st.image(_render("series", [title, xs, ys], draw))